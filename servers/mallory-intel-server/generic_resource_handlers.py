@@ -1,12 +1,27 @@
 """Generic resource handlers for MCP server - fully modular with no hardcoded data."""
 
+import bisect
+import concurrent.futures
+import functools
 import json
+import os
+import re
 import yaml
 from urllib.parse import unquote
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime, timezone
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+# Discovered resource configs and their sorted URI prefixes per tools directory
+_CONFIG_CACHE: Dict[str, Tuple[float, Dict[str, Dict[str, Any]], List[str]]] = {}
+
 
 def format_timestamp() -> str:
     """Generate current timestamp in ISO format."""
@@ -17,53 +32,119 @@ def load_resource_config(tool_dir: Path) -> Optional[Dict[str, Any]]:
     """Load resource configuration for a tool."""
     config_path = tool_dir / "resource_config.yaml"
     if config_path.exists():
-        with open(config_path, "r") as f:
-            return yaml.safe_load(f)
+        with open(config_path, "rb") as f:
+            return yaml.load(f, Loader=_YamlLoader)
     return None
 
 
 def discover_resource_configs(tools_dir: Path) -> Dict[str, Dict[str, Any]]:
     """Discover resource configurations from all tool directories."""
     configs = {}
-    for tool_dir in tools_dir.iterdir():
-        if tool_dir.is_dir():
-            config = load_resource_config(tool_dir)
-            if config:
-                # Map by URI prefix from config
-                for handler in config.get("handlers", []):
-                    uri_prefix = handler["uri_prefix"]
-                    configs[uri_prefix] = {
-                        "tool_dir": tool_dir.name,
-                        "config": handler
-                    }
+    # scandir reuses the file type from the directory listing instead of a stat per entry
+    with os.scandir(tools_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                config = load_resource_config(Path(entry.path))
+                if config:
+                    # Map by URI prefix from config
+                    for handler in config.get("handlers", []):
+                        uri_prefix = handler["uri_prefix"]
+                        # Warm the pattern and template caches so requests skip parsing them
+                        compile_uri_pattern(handler["uri_pattern"])
+                        compile_template(handler["response_template"])
+                        configs[uri_prefix] = {
+                            "tool_dir": entry.name,
+                            "config": handler
+                        }
     return configs
 
 
+def _configs_mtime(tools_dir: Path) -> float:
+    """Return the newest mtime across the tools directory and its resource configs."""
+    latest = tools_dir.stat().st_mtime
+    with os.scandir(tools_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            try:
+                latest = max(latest, os.stat(os.path.join(entry.path, "resource_config.yaml")).st_mtime)
+            except FileNotFoundError:
+                continue
+    return latest
+
+
+def _get_cached_configs(tools_dir: Path) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Return resource configurations and their sorted URI prefixes, rediscovering only when a config file changed."""
+    key = str(tools_dir)
+    mtime = _configs_mtime(tools_dir)
+    cached = _CONFIG_CACHE.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    configs = discover_resource_configs(tools_dir)
+    prefixes = sorted(configs)
+    _CONFIG_CACHE[key] = (mtime, configs, prefixes)
+    return configs, prefixes
+
+
+def match_uri_prefix(uri: str, sorted_prefixes: List[str]) -> Optional[str]:
+    """Find the longest prefix of uri in sorted_prefixes using binary search."""
+    key = uri
+    while True:
+        idx = bisect.bisect_right(sorted_prefixes, key)
+        if idx == 0:
+            return None
+        candidate = sorted_prefixes[idx - 1]
+        if key.startswith(candidate):
+            return candidate
+        # Any matching prefix must also be a prefix of what key shares with candidate
+        key = os.path.commonprefix([key, candidate])
+
+
+@functools.lru_cache(maxsize=None)
+def compile_uri_pattern(uri_pattern: str) -> "re.Pattern[str]":
+    """Compile a URI pattern like 'cve://report/{cve_id}' into a regex with named groups."""
+    parts = _PLACEHOLDER_RE.split(uri_pattern)
+    # re.split with one capture group alternates literal text and parameter names
+    regex = "".join(
+        re.escape(part) if i % 2 == 0 else f"(?P<{part}>[^/]*)"
+        for i, part in enumerate(parts)
+    )
+    return re.compile(regex)
+
+
 def extract_parameters(uri: str, uri_pattern: str) -> Dict[str, str]:
     """Extract parameters from URI based on pattern."""
-    # Simple parameter extraction - split by / and match against pattern
-    uri_parts = uri.split("/")
-    pattern_parts = uri_pattern.split("/")
-    
+    match = compile_uri_pattern(uri_pattern).match(uri)
+    if match:
+        return {name: unquote(value) for name, value in match.groupdict().items()}
+
+    # URI does not follow the pattern's literal segments; fall back to positional matching
     params = {}
-    for i, (uri_part, pattern_part) in enumerate(zip(uri_parts, pattern_parts)):
+    for uri_part, pattern_part in zip(uri.split("/"), uri_pattern.split("/")):
         if pattern_part.startswith("{") and pattern_part.endswith("}"):
-            param_name = pattern_part[1:-1]  # Remove { }
-            params[param_name] = unquote(uri_part)
-    
+            params[pattern_part[1:-1]] = unquote(uri_part)
     return params
 
 
+@functools.lru_cache(maxsize=None)
+def compile_template(template: str) -> Tuple[str, ...]:
+    """Split a template into alternating literal text and placeholder names."""
+    return tuple(_PLACEHOLDER_RE.split(template))
+
+
 def format_template(template: str, variables: Dict[str, Any]) -> str:
-    """Format template string with variables."""
-    result = template
-    for key, value in variables.items():
-        placeholder = f"{{{key}}}"
-        if isinstance(value, (dict, list)):
-            result = result.replace(placeholder, json.dumps(value, indent=2))
-        else:
-            result = result.replace(placeholder, str(value))
-    return result
+    """Format template string with variables in a single pass."""
+    rendered = {
+        key: json.dumps(value, separators=(",", ":"), ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+        for key, value in variables.items()
+    }
+    parts = list(compile_template(template))
+    for i in range(1, len(parts), 2):
+        # Unknown placeholders are left untouched
+        name = parts[i]
+        parts[i] = rendered.get(name, f"{{{name}}}")
+    return "".join(parts)
 
 
 def execute_resource_handler(
@@ -109,32 +190,40 @@ def execute_resource_handler(
     
     elif config["type"] == "multi_tool":
         # Multi-tool execution
-        sections = []
-        
+        runnable = []
         for tool_config in config.get("tools", []):
-            tool_name = tool_config["name"]
-            tool_info = loaded_tools.get(tool_name)
+            tool_info = loaded_tools.get(tool_config["name"])
             
             if tool_info:
-                # Execute tool
                 tool_params = {}
                 for param_name, uri_param in tool_config.get("parameter_mapping", {}).items():
                     if uri_param in params:
                         tool_params[param_name] = params[uri_param]
-                
-                result = execute_tool_func(tool_info, tool_params)
-                
-                # Format result based on configuration
-                if tool_config.get("format") == "json_code_block":
-                    formatted_result = f"```json\n{json.dumps(result, indent=2)}\n```"
-                elif tool_config.get("format") == "text":
-                    formatted_result = result.get("instructions", str(result))
-                else:
-                    formatted_result = str(result)
-                
-                # Add section
-                section_header = tool_config.get("section_header", f"## {tool_name.title()}")
-                sections.append(f"{section_header}\n{formatted_result}")
+                runnable.append((tool_config, tool_info, tool_params))
+        
+        # Tools are independent and mostly network-bound, so run them concurrently
+        results = []
+        if runnable:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(runnable)) as pool:
+                results = list(pool.map(lambda item: execute_tool_func(item[1], item[2]), runnable))
+        
+        sections = []
+        for (tool_config, _, _), result in zip(runnable, results):
+            tool_name = tool_config["name"]
+            
+            # Format result based on configuration
+            if tool_config.get("format") == "json_code_block":
+                formatted_result = f"```json\n{json.dumps(result, indent=2)}\n```"
+            elif tool_config.get("format") == "json":
+                formatted_result = json.dumps(result, separators=(",", ":"), ensure_ascii=False)
+            elif tool_config.get("format") == "text":
+                formatted_result = result.get("instructions", str(result))
+            else:
+                formatted_result = str(result)
+            
+            # Add section
+            section_header = tool_config.get("section_header", f"## {tool_name.title()}")
+            sections.append(f"{section_header}\n{formatted_result}")
         
         variables["sections"] = "\n\n".join(sections)
     
@@ -144,12 +233,12 @@ def execute_resource_handler(
 
 def handle_generic_resource(uri: str, tools_dir: Path, loaded_tools: Dict[str, Any], execute_tool_func) -> str:
     """Handle resource requests using generic configuration-driven approach."""
-    # Discover all resource configurations
-    resource_configs = discover_resource_configs(tools_dir)
+    # Reuse discovered resource configurations unless a config file changed
+    resource_configs, sorted_prefixes = _get_cached_configs(tools_dir)
     
     # Find matching handler
-    for uri_prefix, handler_config in resource_configs.items():
-        if uri.startswith(uri_prefix):
-            return execute_resource_handler(uri, handler_config, loaded_tools, execute_tool_func)
+    uri_prefix = match_uri_prefix(uri, sorted_prefixes)
+    if uri_prefix is not None:
+        return execute_resource_handler(uri, resource_configs[uri_prefix], loaded_tools, execute_tool_func)
     
     raise ValueError(f"No resource handler found for: {uri}") 
\ No newline at end of file
@@ -1,45 +1,126 @@
 """Tool execution module for MCP server."""
 
+import asyncio
 import importlib.util
+import inspect
+import os
 import sys
 import json
-from typing import Dict, Any, List
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import yaml
 import logging
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 logger = logging.getLogger(__name__)
 
+# Loaded tool modules keyed on (module path, mtime) so edits are picked up on the next call
+_MODULE_CACHE: Dict[Tuple[str, float], ModuleType] = {}
+
+def invalidate(module_path: Optional[Path] = None) -> None:
+    """Drop cached tool modules, either for one module path or entirely."""
+    if module_path is None:
+        _MODULE_CACHE.clear()
+        return
+    for key in [k for k in _MODULE_CACHE if k[0] == str(module_path)]:
+        del _MODULE_CACHE[key]
+
+def _load_tool_module(tool: Dict[str, Any], module_path: Path) -> ModuleType:
+    """Load a tool module from disk, reusing the cached module while its file is unchanged."""
+    key = (str(module_path), module_path.stat().st_mtime)
+    tool_module = _MODULE_CACHE.get(key)
+    if tool_module is not None:
+        return tool_module
+
+    spec = importlib.util.spec_from_file_location(tool['name'], module_path)
+    if not spec or not spec.loader:
+        raise ImportError(f"Could not create module spec for {module_path}")
+        
+    tool_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(tool_module)
+
+    invalidate(module_path)
+    _MODULE_CACHE[key] = tool_module
+    # Register under the tool name unless that would shadow an unrelated module
+    existing = sys.modules.get(tool['name'])
+    if existing is None or getattr(existing, '__file__', None) == str(module_path):
+        sys.modules[tool['name']] = tool_module
+    return tool_module
+
+def _resolve_entry_point(tool: Dict[str, Any], workspace_root: Path) -> Callable[..., Any]:
+    """Load a tool's module and return its entry point callable."""
+    # Ensure the module path is absolute
+    relative_path = Path(tool['directory']) / tool['module']
+    module_path = workspace_root / relative_path
+    
+    if not module_path.exists():
+        raise FileNotFoundError(f"Tool module not found at {module_path}")
+
+    tool_module = _load_tool_module(tool, module_path)
+    return getattr(tool_module, tool['entry_point'])
+
 def execute_tool(tool: Dict[str, Any], params: Dict[str, Any], workspace_root: Path) -> Any:
     """Dynamically load and execute a tool's entry point."""
     try:
-        # Ensure the module path is absolute
-        relative_path = Path(tool['directory']) / tool['module']
-        module_path = workspace_root / relative_path
-        
-        if not module_path.exists():
-            raise FileNotFoundError(f"Tool module not found at {module_path}")
-
-        spec = importlib.util.spec_from_file_location(tool['name'], module_path)
-        if not spec or not spec.loader:
-            raise ImportError(f"Could not create module spec for {module_path}")
-            
-        tool_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(tool_module)
-        
-        entry_point = getattr(tool_module, tool['entry_point'])
+        entry_point = _resolve_entry_point(tool, workspace_root)
+        if inspect.iscoroutinefunction(entry_point):
+            return asyncio.run(entry_point(**params))
         return entry_point(**params)
     except Exception as e:
         logger.error(f"Failed to execute tool '{tool['name']}': {e}", exc_info=True)
         # Re-raise to be caught by the server's top-level error handler
         raise  
 
+async def execute_tool_async(tool: Dict[str, Any], params: Dict[str, Any], workspace_root: Path) -> Any:
+    """Execute a tool's entry point without blocking the event loop.
+
+    Coroutine entry points are awaited directly; blocking ones run in a worker thread.
+    """
+    try:
+        entry_point = _resolve_entry_point(tool, workspace_root)
+        if inspect.iscoroutinefunction(entry_point):
+            return await entry_point(**params)
+        return await asyncio.to_thread(entry_point, **params)
+    except Exception as e:
+        logger.error(f"Failed to execute tool '{tool['name']}': {e}", exc_info=True)
+        # Re-raise to be caught by the server's top-level error handler
+        raise  
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    """Parse a whole YAML file, treating an empty file as an empty mapping."""
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+def build_input_schema(inputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a JSON schema object from a tool's input definitions."""
+    properties = {}
+    required = []
+    for input_def in inputs:
+        param_schema = {"type": input_def.get("type", "string")}
+        if "description" in input_def:
+            param_schema["description"] = input_def["description"]
+        properties[input_def["name"]] = param_schema
+        if input_def.get("required", False):
+            required.append(input_def["name"])
+
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": required,
+    }
+
 def validate_tool_params(tool: Dict[str, Any], params: Dict[str, Any]):
     """Validate parameters against the tool's input schema."""
-    required_inputs = {p['name'] for p in tool.get('inputs', []) if p.get('required', False)}
-    provided_params = set(params.keys())
+    required_inputs = tool.get('_required')
+    if required_inputs is None:
+        required_inputs = frozenset(p['name'] for p in tool.get('inputs', []) if p.get('required', False))
     
-    missing_params = required_inputs - provided_params
+    missing_params = required_inputs - params.keys()
     if missing_params:
         raise ValueError(f"Missing required parameters: {', '.join(missing_params)}")
 
@@ -52,36 +133,51 @@ class InternalToolExecutor:
         self.server_name = server_name
         self.tools_path = workspace_root / "servers" / server_name / "tools"
         self.tools = self._discover_tools()
+        self._tools_by_name = {t['name']: t for t in self.tools}
 
     def _discover_tools(self) -> List[Dict[str, Any]]:
         """Discover tools by reading and merging their config.yaml and resource_config.yaml files."""
-        discovered_tools = []
-        for tool_dir in self.tools_path.iterdir():
-            if tool_dir.is_dir():
-                config_path = tool_dir / "config.yaml"
-                resource_config_path = tool_dir / "resource_config.yaml"
-                
-                if not config_path.exists():
-                    continue
-
-                try:
-                    with open(config_path, "r") as f:
-                        config = yaml.safe_load(f) or {}
-
-                    if resource_config_path.exists():
-                        with open(resource_config_path, "r") as f:
-                            resource_config = yaml.safe_load(f) or {}
-                        config.update(resource_config)
-
-                    config.setdefault('inputs', [])
-                    config.setdefault('outputs', [])
-                    config['directory'] = str(tool_dir.relative_to(self.workspace_root))
-                    discovered_tools.append(config)
-
-                except Exception as e:
-                    logger.error(f"Error loading tool from {tool_dir.name}: {e}")
+        with os.scandir(self.tools_path) as entries:
+            tool_dirs = sorted(Path(entry.path) for entry in entries if entry.is_dir())
+
+        loaded = map(self._load_tool, tool_dirs)
+        return [config for config in loaded if config is not None]
+
+    def _load_tool(self, tool_dir: Path) -> Optional[Dict[str, Any]]:
+        """Load and merge a single tool directory's config files."""
+        config_path = tool_dir / "config.yaml"
+        resource_config_path = tool_dir / "resource_config.yaml"
         
-        return discovered_tools
+        if not config_path.exists():
+            return None
+
+        try:
+            # tools/list and the UI need the whole config (prompts, resource templates), so parse it all here
+            config = _load_yaml(config_path)
+            if 'name' not in config:
+                logger.warning(f"Skipping tool in {tool_dir.name}: config.yaml has no 'name'")
+                return None
+
+            if resource_config_path.exists():
+                config.update(_load_yaml(resource_config_path))
+
+            config.setdefault('inputs', [])
+            config.setdefault('outputs', [])
+            config['inputSchema'] = build_input_schema(config['inputs'])
+            config['_required'] = frozenset(config['inputSchema']['required'])
+            config['directory'] = str(tool_dir.relative_to(self.workspace_root))
+            return config
+
+        except Exception as e:
+            logger.error(f"Error loading tool from {tool_dir.name}: {e}")
+            return None
+
+    def _get_tool(self, tool_name: str) -> Dict[str, Any]:
+        """Look up a discovered tool by name."""
+        tool = self._tools_by_name.get(tool_name)
+        if not tool:
+            raise ValueError(f"Tool '{tool_name}' not found.")
+        return tool
 
     def get_tools(self) -> List[Dict[str, Any]]:
         """Return the list of discovered tools."""
@@ -89,9 +185,12 @@ class InternalToolExecutor:
 
     def call_tool(self, tool_name: str, params: Dict[str, Any]) -> Any:
         """Find a tool by name, validate parameters, and execute it."""
-        tool = next((t for t in self.tools if t['name'] == tool_name), None)
-        if not tool:
-            raise ValueError(f"Tool '{tool_name}' not found.")
-        
+        tool = self._get_tool(tool_name)
+        validate_tool_params(tool, params)
+        return execute_tool(tool, params, self.workspace_root)
+
+    async def call_tool_async(self, tool_name: str, params: Dict[str, Any]) -> Any:
+        """Like call_tool, but runs the tool without blocking the event loop."""
+        tool = self._get_tool(tool_name)
         validate_tool_params(tool, params)
-        return execute_tool(tool, params, self.workspace_root) 
\ No newline at end of file
+        return await execute_tool_async(tool, params, self.workspace_root) 
\ No newline at end of file
@@ -4,9 +4,9 @@ MCP Server with stdio transport
 """
 import sys
 import json
+import logging
 from pathlib import Path
 from typing import Dict, Any, List
-from importlib.metadata import version as pkg_version
 
 from mcp.server import Server, NotificationOptions
 from mcp.server.models import InitializationOptions
@@ -14,10 +14,18 @@ from mcp.types import Tool, TextContent
 
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from internal_tool_executor import InternalToolExecutor
 
 load_dotenv()
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 SERVER_ROOT = Path(__file__).parent.resolve()
 WORKSPACE_ROOT = SERVER_ROOT.parent.parent
 SERVER_NAME = "mallory-intel-server"
@@ -25,50 +33,40 @@ SERVER_NAME = "mallory-intel-server"
 server = Server(SERVER_NAME)
 executor = InternalToolExecutor(workspace_root=WORKSPACE_ROOT, server_name=SERVER_NAME)
 
+_tool_objects: List[Tool] = []
+
+
 @server.list_tools()
 async def handle_list_tools() -> List[Tool]:
     """List available tools from the executor, ensuring the correct response format."""
-    discovered_tools = []
-    for tool_config in executor.get_tools():
-        properties = {}
-        required = []
-        for input_def in tool_config.get("inputs", []):
-            param_schema = {"type": input_def.get("type", "string")}
-            if "description" in input_def:
-                param_schema["description"] = input_def["description"]
-            properties[input_def["name"]] = param_schema
-            if input_def.get("required", False):
-                required.append(input_def["name"])
-
-        inputSchema = {
-            "type": "object",
-            "properties": properties,
-            "required": required,
-        }
-
-        tool_obj = Tool(
-            name=tool_config["name"],
-            description=tool_config["description"],
-            inputSchema=inputSchema,
-            data=tool_config
-        )
-        discovered_tools.append(tool_obj)
-
-    return discovered_tools
+    # Tool definitions are static for the lifetime of the process, so build them once
+    if not _tool_objects:
+        for tool_config in executor.get_tools():
+            _tool_objects.append(Tool(
+                name=tool_config["name"],
+                description=tool_config["description"],
+                inputSchema=tool_config["inputSchema"],
+                # Underscored keys are executor bookkeeping, not part of the tool definition
+                data={k: v for k, v in tool_config.items() if not k.startswith('_')}
+            ))
+
+    return list(_tool_objects)
 
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Execute a tool using the executor."""
-    import logging
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
     logger.info(f"Received call for tool '{name}' with arguments: {arguments}")
     try:
-        result = executor.call_tool(tool_name=name, params=arguments)
+        # Blocking tools run in a worker thread so other requests keep being served
+        result = await executor.call_tool_async(tool_name=name, params=arguments)
         
         if isinstance(result, (dict, list, str, int, float, bool, type(None))):
-            content = json.dumps(result, indent=2)
+            # Compact output: clients parse this, so indentation only adds size
+            if orjson:
+                content = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS).decode()
+            else:
+                content = json.dumps(result, separators=(',', ':'), ensure_ascii=False)
         else:
             content = str(result)
             
@@ -80,6 +78,7 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
 
 async def main():
     """Start the MCP server using the stdio transport."""
+    from importlib.metadata import version as pkg_version
     from mcp.server.stdio import stdio_server
 
     capabilities = server.get_capabilities(
@@ -0,0 +1,63 @@
+"""Helpers shared by the tool modules under tools/."""
+
+import json
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def lazy_session(headers: Dict[str, str], pool_connections: int = 10, pool_maxsize: int = 10,
+                 status_forcelist: Iterable[int] = (429, 502, 503, 504)) -> Callable[[], Any]:
+    """
+    Return a function giving a shared keep-alive requests.Session, created on first use.
+    requests is imported then, so tools that never make a call don't pay for it.
+    """
+    session = None
+    lock = threading.Lock()
+
+    def get_session():
+        nonlocal session
+        if session is None:
+            with lock:
+                if session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+
+                    new_session = requests.Session()
+                    new_session.headers.update(headers)
+                    new_session.mount("https://", HTTPAdapter(
+                        pool_connections=pool_connections,
+                        pool_maxsize=pool_maxsize,
+                        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=list(status_forcelist),
+                                          raise_on_status=False),
+                    ))
+                    session = new_session
+        return session
+
+    return get_session
+
+
+def read_json_stdin() -> dict:
+    """
+    Read the JSON request from stdin, using orjson when available.
+    """
+    if orjson:
+        return orjson.loads(sys.stdin.buffer.read())
+    return json.load(sys.stdin)
+
+
+def write_json_stdout(data: dict) -> None:
+    """
+    Write a JSON response to stdout, using orjson when available.
+    """
+    if orjson:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+    else:
+        json.dump(data, sys.stdout)
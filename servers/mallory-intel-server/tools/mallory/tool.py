@@ -1,19 +1,28 @@
 import sys
 import json
 import os
-import requests
+from pathlib import Path
 from urllib.parse import quote
 
+_SERVER_DIR = str(Path(__file__).resolve().parent.parent.parent)
+if _SERVER_DIR not in sys.path:
+    # The server puts its directory on sys.path; add it when the tool is run directly as a script
+    sys.path.append(_SERVER_DIR)
+from tool_support import lazy_session, read_json_stdin, write_json_stdout
+
 # --- Configuration ---
 MALLORY_API_URL = "https://api.mallory.ai/v1"
 MALLORY_API_KEY = os.environ.get("MALLORY_API_KEY")
 
+# --- HTTP Session ---
+# Shared session so repeated calls reuse the same keep-alive connection
+_get_session = lazy_session({"Authorization": f"Bearer {MALLORY_API_KEY}"})
+
 def mallory_sources() -> dict:
     """
     Retrieve all OSINT sources monitored by Mallory AI.
     """
-    headers = {"Authorization": f"Bearer {MALLORY_API_KEY}"}
-    response = requests.get(f"{MALLORY_API_URL}/sources", headers=headers)
+    response = _get_session().get(f"{MALLORY_API_URL}/sources")
     
     if response.status_code == 200:
         return response.json()
@@ -28,7 +37,6 @@ def mallory_references(indicator: str = None, source_filter: str = None) -> dict
     """
     Query Mallory AI for intelligence references.
     """
-    headers = {"Authorization": f"Bearer {MALLORY_API_KEY}"}
     params = {}
     
     if source_filter:
@@ -36,7 +44,7 @@ def mallory_references(indicator: str = None, source_filter: str = None) -> dict
     if indicator:
         params["q"] = indicator
     
-    response = requests.get(f"{MALLORY_API_URL}/references", headers=headers, params=params)
+    response = _get_session().get(f"{MALLORY_API_URL}/references", params=params)
     
     if response.status_code == 200:
         return response.json()
@@ -51,7 +59,7 @@ def mallory_vulnerability_search(product: str = None, vendor: str = None, cpe: s
     """
     Search for products in Mallory's vulnerability database.
     """
-    headers = {"Authorization": f"Bearer {MALLORY_API_KEY}", "Content-Type": "application/json"}
+    headers = {"Content-Type": "application/json"}
     
     payload = {}
     if cpe:
@@ -65,7 +73,7 @@ def mallory_vulnerability_search(product: str = None, vendor: str = None, cpe: s
     if not cpe and not payload.get("type"):
         payload["type"] = "application"
     
-    response = requests.post(f"{MALLORY_API_URL}/products/search", headers=headers, json=payload)
+    response = _get_session().post(f"{MALLORY_API_URL}/products/search", headers=headers, json=payload)
     
     if response.status_code == 200:
         return response.json()
@@ -80,11 +88,9 @@ def mallory_exploits(cve_identifier: str) -> dict:
     """
     Get exploit information for a specific CVE.
     """
-    headers = {"Authorization": f"Bearer {MALLORY_API_KEY}"}
-    
     # URL encode the CVE identifier
     encoded_cve = quote(cve_identifier, safe='')
-    response = requests.get(f"{MALLORY_API_URL}/vulnerabilities/{encoded_cve}/exploits", headers=headers)
+    response = _get_session().get(f"{MALLORY_API_URL}/vulnerabilities/{encoded_cve}/exploits")
     
     if response.status_code == 200:
         return response.json()
@@ -146,7 +152,7 @@ if __name__ == "__main__":
         result = mallory_query(action, **kwargs)
     else:
         # JSON input from MCP server
-        input_data = json.load(sys.stdin)
+        input_data = read_json_stdin()
         action = input_data.get("action")
         
         if not action:
@@ -157,4 +163,4 @@ if __name__ == "__main__":
         kwargs = {k: v for k, v in input_data.items() if k != "action"}
         result = mallory_query(action, **kwargs)
 
-    json.dump({"intel": result}, sys.stdout) 
\ No newline at end of file
+    write_json_stdout({"intel": result}) 
\ No newline at end of file
@@ -1,29 +1,36 @@
 import sys
 import json
 import os
-import requests
 import time
+from pathlib import Path
 from urllib.parse import quote
 
+_SERVER_DIR = str(Path(__file__).resolve().parent.parent.parent)
+if _SERVER_DIR not in sys.path:
+    # The server puts its directory on sys.path; add it when the tool is run directly as a script
+    sys.path.append(_SERVER_DIR)
+from tool_support import lazy_session, read_json_stdin, write_json_stdout
+
 # --- Configuration ---
 URLSCAN_API_URL = "https://urlscan.io/api/v1"
 URLSCAN_API_KEY = os.environ.get("URLSCAN_API_KEY")
 
+# --- HTTP Session ---
+# Shared session so submit and result polling reuse the same keep-alive connection
+_get_session = lazy_session({"API-Key": URLSCAN_API_KEY} if URLSCAN_API_KEY else {})
+
 def urlscan_submit(url: str, visibility: str = "public") -> dict:
     """
     Submit a URL for scanning to urlscan.io.
     """
-    headers = {
-        "API-Key": URLSCAN_API_KEY,
-        "Content-Type": "application/json"
-    }
+    headers = {"Content-Type": "application/json"}
     
     payload = {
         "url": url,
         "visibility": visibility
     }
     
-    response = requests.post(f"{URLSCAN_API_URL}/scan/", headers=headers, json=payload)
+    response = _get_session().post(f"{URLSCAN_API_URL}/scan/", headers=headers, json=payload)
     
     if response.status_code == 200:
         return response.json()
@@ -38,7 +45,7 @@ def urlscan_result(scan_uuid: str) -> dict:
     """
     Retrieve scan results from urlscan.io.
     """
-    response = requests.get(f"{URLSCAN_API_URL}/result/{scan_uuid}/")
+    response = _get_session().get(f"{URLSCAN_API_URL}/result/{scan_uuid}/")
     
     if response.status_code == 200:
         return response.json()
@@ -60,7 +67,7 @@ def urlscan_search(query: str, size: int = 100) -> dict:
         "size": size
     }
     
-    response = requests.get(f"{URLSCAN_API_URL}/search/", params=params)
+    response = _get_session().get(f"{URLSCAN_API_URL}/search/", params=params)
     
     if response.status_code == 200:
         return response.json()
@@ -85,11 +92,14 @@ def urlscan_scan_and_wait(url: str, visibility: str = "public", max_wait: int =
     if not scan_uuid:
         return {"error": "No scan UUID returned from submission"}
     
-    # Wait for results
+    # Wait for results, backing off exponentially (2s, 4s, 8s, then every 10s)
     wait_time = 0
+    delay = 2.0
     while wait_time < max_wait:
-        time.sleep(5)
-        wait_time += 5
+        sleep_for = min(delay, max_wait - wait_time)
+        time.sleep(sleep_for)
+        wait_time += sleep_for
+        delay = min(delay * 2, 10.0)
         
         result = urlscan_result(scan_uuid)
         
@@ -144,7 +154,7 @@ if __name__ == "__main__":
             print("Usage: python tool.py <url>")
             sys.exit(1)
     else:
-        input_data = json.load(sys.stdin)
+        input_data = read_json_stdin()
         input_url = input_data.get("url")
 
     if not input_url:
@@ -152,4 +162,4 @@ if __name__ == "__main__":
         sys.exit(1)
 
     scan_data = urlscan_scan(input_url)
-    json.dump({"scan_data": scan_data}, sys.stdout) 
\ No newline at end of file
+    write_json_stdout({"scan_data": scan_data}) 
\ No newline at end of file
@@ -1,49 +1,157 @@
 import sys
-import json
 import os
 import re
-import requests
 import base64
+import functools
 import time
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SERVER_DIR = str(Path(__file__).resolve().parent.parent.parent)
+if _SERVER_DIR not in sys.path:
+    # The server puts its directory on sys.path; add it when the tool is run directly as a script
+    sys.path.append(_SERVER_DIR)
+from tool_support import lazy_session, read_json_stdin, write_json_stdout
 
 # --- Configuration ---
 VT_API_URL = "https://www.virustotal.com/api/v3"
 VT_API_KEY = os.environ.get("VIRUSTOTAL_API_KEY")
+# Requests per minute; the public API allows 4
+_DEFAULT_RATE_LIMIT = 4.0
+
+def _rate_limit_from_env() -> float:
+    """
+    Read VIRUSTOTAL_RATE_LIMIT, falling back to the public API limit if it is unset, invalid or not positive.
+    """
+    try:
+        rate = float(os.environ.get("VIRUSTOTAL_RATE_LIMIT", _DEFAULT_RATE_LIMIT))
+    except ValueError:
+        return _DEFAULT_RATE_LIMIT
+    return rate if rate > 0 else _DEFAULT_RATE_LIMIT
+
+VT_RATE_LIMIT = _rate_limit_from_env()
+
+# --- Rate Limiting ---
+class RateLimiter:
+    """
+    Token bucket allowing `rate` calls per `per` seconds, blocking callers until a token is free.
+    """
+    def __init__(self, rate: float, per: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = rate
+        self.ts = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Take one token, sleeping until the bucket has refilled enough to provide it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.ts) * self.rate / self.per)
+                self.ts = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.per / self.rate
+            time.sleep(wait)
+
+_RATE_LIMITER = RateLimiter(rate=VT_RATE_LIMIT, per=60.0)
+
+# --- Response Cache ---
+# Successful lookups are reused briefly; reputation data doesn't change second to second
+_CACHE_TTL = 120.0
+_CACHE_MAXSIZE = 1024
+_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+def _cache_get(key: str):
+    """
+    Return a cached, unexpired result for key, or None.
+    """
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _CACHE[key]
+            return None
+        return value
+
+def _cache_put(key: str, value: dict) -> None:
+    """
+    Store a result, evicting the oldest entries beyond the size bound.
+    """
+    with _CACHE_LOCK:
+        _CACHE[key] = (time.monotonic() + _CACHE_TTL, value)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > _CACHE_MAXSIZE:
+            _CACHE.popitem(last=False)
+
+# --- HTTP Session ---
+# Shared session so URL analysis polling reuses the same keep-alive connection. The adapter
+# retries connection errors only; status retries are done by _vt_call_retry so every attempt is rate limited
+_get_session = lazy_session({"x-apikey": VT_API_KEY}, pool_connections=4, pool_maxsize=16, status_forcelist=())
 
 # --- Query Type Detection ---
+# One alternation applied with fullmatch, so every group is anchored at the end of the string
+# the same way; a URL only needs the scheme prefix, the rest may be anything
+_QUERY_TYPE_RE = re.compile(
+    r"(?P<url>https?://.*)"
+    r"|(?P<ip_address>\d{1,3}(?:\.\d{1,3}){3})"
+    r"|(?P<domain>(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,6})"
+    r"|(?P<file>[a-fA-F0-9]{64}|[a-fA-F0-9]{40}|[a-fA-F0-9]{32})",
+    re.DOTALL,
+)
+
 def get_query_type(query: str) -> str:
     """
     Determines if the query is an IP, domain, URL, or file hash.
     """
-    if re.match(r"^\d{1,3}(\.\d{1,3}){3}$", query):
-        return "ip_address"
-    if re.match(r"^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,6}$", query):
-        return "domain"
-    if re.match(r"^[a-fA-F0-9]{32}$", query) or \
-       re.match(r"^[a-fA-F0-9]{40}$", query) or \
-       re.match(r"^[a-fA-F0-9]{64}$", query):
-        return "file"
-    if query.startswith("http://") or query.startswith("https://"):
-        return "url"
-    return "unknown"
+    m = _QUERY_TYPE_RE.fullmatch(query)
+    return m.lastgroup if m else "unknown"
 
+@functools.lru_cache(maxsize=4096)
 def url_to_id(url: str) -> str:
     """
     Convert URL to VirusTotal URL ID (base64 encoded without padding).
     """
-    url_id = base64.urlsafe_b64encode(url.encode()).decode().rstrip('=')
-    return url_id
+    return base64.urlsafe_b64encode(url.encode()).rstrip(b'=').decode('ascii')
 
 # --- API Call Logic ---
+def _response_json(response) -> dict:
+    """
+    Decode a response body, using orjson when available (VT reports can be hundreds of KB).
+    """
+    if orjson:
+        return orjson.loads(response.content)
+    return response.json()
+
 def query_virustotal_api(endpoint: str) -> dict:
     """
     Queries the VirusTotal API with the given endpoint.
     """
-    headers = {"x-apikey": VT_API_KEY}
-    response = requests.get(f"{VT_API_URL}/{endpoint}", headers=headers)
+    cached = _cache_get(endpoint)
+    if cached is not None:
+        return cached
+
+    # The lock only guards the cache, so concurrent lookups don't serialize on the request
+    _RATE_LIMITER.acquire()
+    response = _get_session().get(f"{VT_API_URL}/{endpoint}")
     
     if response.status_code == 200:
-        return response.json()
+        result = _response_json(response)
+        _cache_put(endpoint, result)
+        return result
     else:
         return {
             "error": "API request failed",
@@ -55,13 +163,14 @@ def submit_url_for_analysis(url: str) -> dict:
     """
     Submit a URL for analysis to VirusTotal.
     """
-    headers = {"x-apikey": VT_API_KEY, "Content-Type": "application/x-www-form-urlencoded"}
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
     data = {"url": url}
     
-    response = requests.post(f"{VT_API_URL}/urls", headers=headers, data=data)
+    _RATE_LIMITER.acquire()
+    response = _get_session().post(f"{VT_API_URL}/urls", headers=headers, data=data)
     
     if response.status_code == 200:
-        return response.json()
+        return _response_json(response)
     else:
         return {
             "error": "Failed to submit URL for analysis",
@@ -73,11 +182,11 @@ def get_analysis_result(analysis_id: str) -> dict:
     """
     Get analysis results from VirusTotal.
     """
-    headers = {"x-apikey": VT_API_KEY}
-    response = requests.get(f"{VT_API_URL}/analyses/{analysis_id}", headers=headers)
+    _RATE_LIMITER.acquire()
+    response = _get_session().get(f"{VT_API_URL}/analyses/{analysis_id}")
     
     if response.status_code == 200:
-        return response.json()
+        return _response_json(response)
     else:
         return {
             "error": "Failed to get analysis result",
@@ -85,13 +194,30 @@ def get_analysis_result(analysis_id: str) -> dict:
             "response": response.text,
         }
 
+_TRANSIENT_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+
+def _vt_call_retry(fn, *args, max_attempts: int = 4) -> dict:
+    """
+    Call a VirusTotal API helper, retrying with exponential backoff (0.3s doubling, capped at 8s)
+    while it returns a transient error (rate limited or 5xx). Other errors are returned as-is.
+    """
+    delay = 0.3
+    for attempt in range(max_attempts):
+        result = fn(*args)
+        if "error" not in result or result.get("status_code") not in _TRANSIENT_STATUS_CODES:
+            return result
+        if attempt < max_attempts - 1:
+            time.sleep(delay)
+            delay = min(delay * 2, 8.0)
+    return result
+
 def virustotal_url_analysis(url: str, wait_for_completion: bool = True, max_wait: int = 60) -> dict:
     """
     Analyze a URL with VirusTotal, optionally waiting for completion.
     """
     # First, try to get existing analysis
     url_id = url_to_id(url)
-    existing_result = query_virustotal_api(f"urls/{url_id}")
+    existing_result = _vt_call_retry(query_virustotal_api, f"urls/{url_id}")
     
     if "error" not in existing_result:
         return {
@@ -102,7 +228,7 @@ def virustotal_url_analysis(url: str, wait_for_completion: bool = True, max_wait
         }
     
     # Submit for new analysis
-    submission = submit_url_for_analysis(url)
+    submission = _vt_call_retry(submit_url_for_analysis, url)
     if "error" in submission:
         return submission
     
@@ -119,19 +245,21 @@ def virustotal_url_analysis(url: str, wait_for_completion: bool = True, max_wait
             "message": f"URL submitted for analysis. Check results manually with analysis ID: {analysis_id}"
         }
     
-    # Wait for analysis completion
-    wait_time = 0
-    while wait_time < max_wait:
-        time.sleep(5)
-        wait_time += 5
+    # Wait for analysis completion, polling densely at first and backing off (0.5s, 0.75s, ... capped at 8s)
+    # Measured against the clock so rate limiter waits, request time and retries count toward max_wait
+    deadline = time.monotonic() + max_wait
+    delay = 0.5
+    while (remaining := deadline - time.monotonic()) > 0:
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 1.5, 8.0)
         
-        analysis_result = get_analysis_result(analysis_id)
+        analysis_result = _vt_call_retry(get_analysis_result, analysis_id)
         
         if "error" not in analysis_result:
             status = analysis_result.get("data", {}).get("attributes", {}).get("status")
             if status == "completed":
                 # Get the final URL report
-                url_report = query_virustotal_api(f"urls/{url_id}")
+                url_report = _vt_call_retry(query_virustotal_api, f"urls/{url_id}")
                 return {
                     "url": url,
                     "url_id": url_id,
@@ -168,15 +296,15 @@ def virustotal_query(query: str) -> dict:
     
     if query_type == "ip_address":
         endpoint = f"ip_addresses/{query}"
-        return query_virustotal_api(endpoint)
+        return _vt_call_retry(query_virustotal_api, endpoint)
     
     elif query_type == "domain":
         endpoint = f"domains/{query}"
-        return query_virustotal_api(endpoint)
+        return _vt_call_retry(query_virustotal_api, endpoint)
     
     elif query_type == "file":
         endpoint = f"files/{query}"
-        return query_virustotal_api(endpoint)
+        return _vt_call_retry(query_virustotal_api, endpoint)
     
     elif query_type == "url":
         return virustotal_url_analysis(query)
@@ -187,7 +315,7 @@ def virustotal_query(query: str) -> dict:
 # --- Main Execution ---
 if __name__ == "__main__":
     if not VT_API_KEY:
-        json.dump({"error": "VIRUSTOTAL_API_KEY environment variable not set."}, sys.stdout)
+        write_json_stdout({"error": "VIRUSTOTAL_API_KEY environment variable not set."})
         sys.exit(1)
 
     if sys.stdin.isatty():
@@ -197,12 +325,12 @@ if __name__ == "__main__":
             print("Usage: python tool.py <query>")
             sys.exit(1)
     else:
-        input_data = json.load(sys.stdin)
+        input_data = read_json_stdin()
         input_query = input_data.get("query")
 
     if not input_query:
-        json.dump({"error": "No query provided"}, sys.stdout)
+        write_json_stdout({"error": "No query provided"})
         sys.exit(1)
 
     result = virustotal_query(input_query)
-    json.dump({"result": result}, sys.stdout) 
\ No newline at end of file
+    write_json_stdout({"result": result}) 
\ No newline at end of file
@@ -27,33 +27,35 @@ def create_app(config_name: str) -> Flask:
     )
     app.config.from_object(config_by_name[config_name])
     
-    # Initialize services and store them for access within the application context
+    # Initialize services once; they are stateless or hold long-lived resources
+    workspace_root = app.config['WORKSPACE_ROOT']
+    prompt_storage = YAMLPromptStorage(str(Path(workspace_root) / 'web-interface' / 'custom-prompts'))
+    storage_config = StorageConfig(
+        backend_type="yaml",
+        backup_enabled=True,
+        backup_count=5,
+        encryption_enabled=False,
+        validation_enabled=True
+    )
+    prompt_manager = PromptManager(prompt_storage)
+    transport_handlers = {
+        "http": HttpTransportHandler(),
+        "stdio": StdioTransportHandler(workspace_root, capture_stderr=app.config.get('DEBUG', False)),
+    }
+    services = {
+        'server_discovery': RegistryDiscoverer(workspace_root),
+        'virtual_server_manager': VirtualServerManager(workspace_root, prompt_manager=prompt_manager),
+        'prompt_manager': prompt_manager,
+        'storage_backend': YAMLBackend(storage_config, workspace_root),
+        'tool_proxy_router': ToolProxyRouter(transport_handlers),
+    }
+    app.extensions.update(services)
+
+    # Expose the shared services on g for access within the application context
     @app.before_request
     def before_request():
-        if 'server_discovery' not in g:
-            g.server_discovery = RegistryDiscoverer(app.config['WORKSPACE_ROOT'])
-        if 'virtual_server_manager' not in g:
-            g.virtual_server_manager = VirtualServerManager(app.config['WORKSPACE_ROOT'])
-        if 'prompt_manager' not in g:
-            prompt_storage = YAMLPromptStorage(str(Path(app.config['WORKSPACE_ROOT']) / 'web-interface' / 'custom-prompts'))
-            g.prompt_manager = PromptManager(prompt_storage)
-        if 'storage_backend' not in g:
-            storage_config = StorageConfig(
-                backend_type="yaml",
-                backup_enabled=True,
-                backup_count=5,
-                encryption_enabled=False,
-                validation_enabled=True
-            )
-            g.storage_backend = YAMLBackend(storage_config, app.config['WORKSPACE_ROOT'])
-        if 'tool_proxy_router' not in g:
-            http_handler = HttpTransportHandler()
-            stdio_handler = StdioTransportHandler(app.config['WORKSPACE_ROOT'])
-            transport_handlers = {
-                "http": http_handler,
-                "stdio": stdio_handler,
-            }
-            g.tool_proxy_router = ToolProxyRouter(transport_handlers)
+        for name, service in services.items():
+            setattr(g, name, service)
 
     # Register Blueprints
     from .ui.routes import ui_bp
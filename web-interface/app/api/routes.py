@@ -1,21 +1,47 @@
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, request, g
+import queue
 import secrets
+import threading
+
+from app.core.serialization import json_response
 
 api_bp = Blueprint('api', __name__)
 
+# Pre-generated API keys, topped up by a background thread so key creation
+# doesn't hit the OS entropy source on the request path.
+_KEY_POOL: "queue.Queue[str]" = queue.Queue(maxsize=64)
+_key_filler_lock = threading.Lock()
+_key_filler_started = False
+
+def _fill_key_pool():
+    while True:
+        _KEY_POOL.put(secrets.token_hex(32))  # blocks while the pool is full
+
+def _new_api_key() -> str:
+    """Take an API key from the pool, generating one directly if it is empty."""
+    global _key_filler_started
+    if not _key_filler_started:
+        with _key_filler_lock:
+            if not _key_filler_started:
+                threading.Thread(target=_fill_key_pool, name="api-key-pool", daemon=True).start()
+                _key_filler_started = True
+    try:
+        return _KEY_POOL.get_nowait()
+    except queue.Empty:
+        return secrets.token_hex(32)
+
 @api_bp.route('/tools/<path:tool_directory>/toggle', methods=['POST'])
 def toggle_tool(tool_directory):
     """API endpoint to toggle a tool's enabled status."""
     try:
-        if '/' in tool_directory:
-            server_name, tool_name = tool_directory.split('/', 1)
-        else:
-            return jsonify({'error': 'Invalid tool directory format'}), 400
+        server_name, sep, tool_name = tool_directory.partition('/')
+        if not sep:
+            return json_response({'error': 'Invalid tool directory format'}, 400)
         
         servers = g.server_discovery.discover()
         server = next((s for s in servers if s.name == server_name), None)
         if not server:
-            return jsonify({'error': f'Server {server_name} not found'}), 404
+            return json_response({'error': f'Server {server_name} not found'}, 404)
         
         tool_found = False
         for tool in server.tools:
@@ -26,7 +52,7 @@ def toggle_tool(tool_directory):
                 break
         
         if not tool_found:
-            return jsonify({'error': f'Tool {tool_name} not found in server {server_name}'}), 404
+            return json_response({'error': f'Tool {tool_name} not found in server {server_name}'}, 404)
         
         # This is a bit tricky, as we'd need to save back to the registry file.
         # The storage_backend is for virtual servers, not registry entries.
@@ -34,7 +60,7 @@ def toggle_tool(tool_directory):
         # A more robust solution would be needed to persist this.
         
         new_status = tool.get('enabled', True)
-        return jsonify({
+        return json_response({
             'success': True,
             'message': f'Tool {tool_name} {"enabled" if new_status else "disabled"} successfully (in-memory)',
             'tool_directory': tool_directory,
@@ -42,13 +68,13 @@ def toggle_tool(tool_directory):
         })
         
     except Exception as e:
-        return jsonify({'error': f'Failed to toggle tool: {str(e)}'}), 500
+        return json_response({'error': f'Failed to toggle tool: {str(e)}'}, 500)
 
 @api_bp.route('/registry', methods=['GET'])
 def list_registry_entries():
     """API endpoint to list all registry entries."""
     registry_entries = g.server_discovery.discover()
-    return jsonify([{
+    return json_response([{
         'name': entry.name,
         'description': entry.description,
         'path': entry.path,
@@ -61,22 +87,25 @@ def list_registry_entries():
 def refresh_registry():
     """API endpoint to refresh registry discovery."""
     try:
-        g.server_discovery.discover() # The new discover method inherently refreshes
-        return jsonify({'message': 'Registry refreshed successfully'})
+        g.server_discovery.invalidate()
+        g.tool_proxy_router.invalidate()
+        g.virtual_server_manager.invalidate_discovery()
+        g.server_discovery.discover()
+        return json_response({'message': 'Registry refreshed successfully'})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @api_bp.route('/servers', methods=['GET'])
 def list_servers():
     """API endpoint to list all virtual servers."""
     servers = g.virtual_server_manager.list_virtual_servers()
-    return jsonify([{
+    return json_response([{
         'name': server.name,
         'description': server.description,
         'enabled': server.enabled,
         'created_at': server.created_at,
-        'proxy_url': f'/mcp/{server.name}',
-        'sse_url': f'/mcp-sse/{server.name}'
+        'proxy_url': server.proxy_url,
+        'sse_url': server.sse_url
     } for server in servers])
 
 @api_bp.route('/servers', methods=['POST'])
@@ -86,9 +115,9 @@ def create_server():
         data = request.get_json()
         required_fields = ['name', 'description', 'selected_tools']
         if not all(field in data for field in required_fields):
-            return jsonify({'error': 'Missing required fields'}), 400
+            return json_response({'error': 'Missing required fields'}, 400)
         
-        api_key = secrets.token_hex(32)
+        api_key = _new_api_key()
 
         server = g.virtual_server_manager.create_virtual_server(
             name=data['name'],
@@ -99,22 +128,22 @@ def create_server():
             api_key=api_key
         )
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'Server created successfully',
             'server': {
                 'name': server.name,
                 'description': server.description,
                 'enabled': server.enabled,
-                'proxy_url': f'/mcp/{server.name}',
-                'sse_url': f'/mcp-sse/{server.name}'
+                'proxy_url': server.proxy_url,
+                'sse_url': server.sse_url
             }
-        }), 201
+        }, 201)
         
     except ValueError as e:
-        return jsonify({'error': str(e)}), 409 # Conflict
+        return json_response({'error': str(e)}, 409) # Conflict
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @api_bp.route('/servers/<server_name>', methods=['PUT'])
 def update_server(server_name):
@@ -124,12 +153,12 @@ def update_server(server_name):
         server = g.virtual_server_manager.get_virtual_server(server_name)
         
         if not server:
-            return jsonify({'error': 'Server not found'}), 404
+            return json_response({'error': 'Server not found'}, 404)
         
         # The manager will handle the update logic. We just pass the data.
         g.virtual_server_manager.update_virtual_server(server, data)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'Server updated successfully',
             'server': {
@@ -140,7 +169,7 @@ def update_server(server_name):
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @api_bp.route('/servers/<server_name>/regenerate-key', methods=['POST'])
 def regenerate_api_key(server_name):
@@ -148,18 +177,18 @@ def regenerate_api_key(server_name):
     try:
         server = g.virtual_server_manager.get_virtual_server(server_name)
         if not server:
-            return jsonify({'error': 'Server not found'}), 404
+            return json_response({'error': 'Server not found'}, 404)
             
-        new_key = secrets.token_hex(32)
+        new_key = _new_api_key()
         g.virtual_server_manager.update_virtual_server(server, {'api_key': new_key})
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'API key regenerated successfully',
             'api_key': new_key
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @api_bp.route('/servers/<server_name>', methods=['DELETE'])
@@ -168,12 +197,12 @@ def delete_server(server_name):
     try:
         success = g.virtual_server_manager.delete_virtual_server(server_name)
         if success:
-            return jsonify({'success': True, 'message': 'Server deleted successfully'})
+            return json_response({'success': True, 'message': 'Server deleted successfully'})
         else:
-            return jsonify({'error': 'Server not found'}), 404
+            return json_response({'error': 'Server not found'}, 404)
             
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @api_bp.route('/servers/<server_name>/status', methods=['GET'])
 def server_status(server_name):
@@ -181,9 +210,9 @@ def server_status(server_name):
     try:
         server = g.virtual_server_manager.get_virtual_server(server_name)
         if not server:
-            return jsonify({'error': 'Server not found'}), 404
+            return json_response({'error': 'Server not found'}, 404)
         
-        return jsonify({
+        return json_response({
             'name': server.name,
             'status': server.status,
             'enabled': server.enabled,
@@ -191,4 +220,4 @@ def server_status(server_name):
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
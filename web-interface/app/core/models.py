@@ -2,13 +2,15 @@
 """
 Data models for the MCP server composition system.
 """
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, asdict, field
+from typing import ClassVar, Dict, List, Any, Optional
 from abc import ABC, abstractmethod
 
 @dataclass
 class IServer(ABC):
     """An abstract base class for any type of server (real or virtual)."""
+    # Class-level flag (not a dataclass field) so handlers can branch without attribute probing
+    is_virtual: ClassVar[bool] = False
     name: str
 
 @dataclass
@@ -29,6 +31,7 @@ class ServerInfo(IServer):
 @dataclass
 class VirtualServer(IServer):
     """Represents a composed server with a specific set of tools and rules."""
+    is_virtual: ClassVar[bool] = True
     description: str
     selected_tools: List[Dict[str, Any]]
     rules: List[Dict[str, Any]]
@@ -38,4 +41,33 @@ class VirtualServer(IServer):
     port: Optional[int] = None
     status: str = 'stopped'  # 'running', 'stopped', 'error'
     api_key: Optional[str] = None
-    selected_prompts: List[str] = None  # List of CustomPrompt IDs
\ No newline at end of file
+    selected_prompts: List[str] = field(default_factory=list)  # List of CustomPrompt IDs
+
+    def __post_init__(self):
+        # Stored configs may carry an explicit null
+        if self.selected_prompts is None:
+            self.selected_prompts = []
+        # Endpoint paths depend only on the (immutable) name; plain attributes, not persisted fields
+        self.proxy_url = f'/mcp/{self.name}'
+        self.sse_url = f'/mcp-sse/{self.name}'
+        self._tools_index_src = None
+        self._tools_by_name: Dict[str, Dict[str, Any]] = {}
+        self._prompts_index_src = None
+        self._prompts_set: frozenset = frozenset()
+
+    def get_selected_tool(self, tool_name: str) -> Optional[Dict[str, Any]]:
+        """Return the selected tool config for tool_name, using an index rebuilt when selected_tools is replaced."""
+        if self._tools_index_src is not self.selected_tools:
+            self._tools_by_name = {}
+            for t in self.selected_tools or ():
+                # Keep the first entry per name, as a linear scan would
+                self._tools_by_name.setdefault(t.get('tool_name'), t)
+            self._tools_index_src = self.selected_tools
+        return self._tools_by_name.get(tool_name)
+
+    def has_prompt(self, prompt_id: str) -> bool:
+        """Check whether prompt_id is one of the selected custom prompts."""
+        if self._prompts_index_src is not self.selected_prompts:
+            self._prompts_set = frozenset(self.selected_prompts or ())
+            self._prompts_index_src = self.selected_prompts
+        return prompt_id in self._prompts_set
@@ -0,0 +1,41 @@
+"""
+JSON helpers for hot request paths. Uses orjson when installed, stdlib json otherwise.
+"""
+import json
+from typing import Any
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to compact JSON bytes."""
+        return orjson.dumps(obj, option=_OPTIONS)
+
+    def dumps_pretty(obj: Any) -> str:
+        """Serialize obj to JSON text indented by two spaces."""
+        return orjson.dumps(obj, option=_OPTIONS | orjson.OPT_INDENT_2).decode()
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to compact JSON bytes."""
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+    def dumps_pretty(obj: Any) -> str:
+        """Serialize obj to JSON text indented by two spaces."""
+        return json.dumps(obj, indent=2)
+
+    loads = json.loads
+
+_JSON_MIMETYPE = 'application/json'
+
+def json_response(obj: Any, status: int = 200) -> Response:
+    """Build an application/json response from obj, bypassing Flask's JSON provider."""
+    return Response(dumps(obj), status=status, mimetype=_JSON_MIMETYPE)
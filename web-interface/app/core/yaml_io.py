@@ -0,0 +1,85 @@
+"""
+Helpers for reading and writing the YAML files the app and storage backend keep on disk.
+"""
+import copy
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.serialization import dumps, loads
+
+try:
+    from yaml import CSafeDumper as _BaseDumper
+except ImportError:
+    from yaml import SafeDumper as _BaseDumper
+
+
+class NoAliasDumper(_BaseDumper):
+    """Never emit anchors/aliases, so records sharing objects dump like the deep copies asdict() made."""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+def read_file(path: Path, size: int) -> bytes:
+    """
+    Read a whole file with a raw descriptor, sized from a stat the caller already did.
+    Skips the extra fstat/ioctl/lseek calls and decoding of a buffered text-mode open().
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+    try:
+        # One read normally suffices; keep going in case the file grew since the stat
+        chunks = [os.read(fd, size + 1)]
+        while chunks[-1]:
+            chunks.append(os.read(fd, 65536))
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
+
+
+class ParsedFileCache:
+    """
+    Parsed file contents keyed by path, valid while the file's (mtime_ns, size) is unchanged.
+    Each entry also keeps a JSON snapshot of the data when it round-trips losslessly, since
+    decoding that in C is several times faster than deep-copying the data for each caller.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Path, Tuple[int, int, Any, Optional[bytes]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, st: os.stat_result) -> Any:
+        """Return a private copy of path's cached data at the given stat; KeyError if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+            raise KeyError(path)
+        return loads(entry[3]) if entry[3] is not None else copy.deepcopy(entry[2])
+
+    def put(self, path: Path, st: os.stat_result, data: Any) -> None:
+        """Cache data as the parsed content of path at the given stat. data must not be modified afterwards."""
+        try:
+            snapshot = dumps(data)
+            # YAML can yield types JSON would change (timestamps, non-string keys); deep-copy those instead
+            if loads(snapshot) != data:
+                snapshot = None
+        except TypeError:
+            snapshot = None
+        with self._lock:
+            self._entries[path] = (st.st_mtime_ns, st.st_size, data, snapshot)
+
+    def discard(self, path: Path) -> None:
+        """Drop path's entry, if any."""
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def paths(self) -> List[Path]:
+        """Return the paths that currently have an entry."""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
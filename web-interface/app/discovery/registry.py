@@ -1,13 +1,22 @@
+import copy
 import logging
+import os
+import threading
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from app.core.models import ServerInfo
 from app.discovery.base import IServerDiscoverer
 from app.discovery.scm import GitManager
 
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
 logger = logging.getLogger(__name__)
 
 class RegistryDiscoverer(IServerDiscoverer):
@@ -17,13 +26,61 @@ class RegistryDiscoverer(IServerDiscoverer):
         self.workspace_root = workspace_root
         self.registry_path = workspace_root / "registry"
         self.git_manager = GitManager()
+        self._cached_servers: Optional[List[ServerInfo]] = None
+        self._cached_fingerprint: Optional[Tuple] = None
+        self._cache_lock = threading.Lock()
+        self._name_to_file: Dict[str, Path] = {}
+        self._name_to_config: Dict[str, Dict[str, Any]] = {}
 
     def discover(self) -> List[ServerInfo]:
-        """Discover all MCP servers from the registry/ folder."""
+        """
+        Discover all MCP servers from the registry/ folder.
+        Results are cached until a registry file is added, removed or modified.
+        """
+        with self._cache_lock:
+            fingerprint = self._fingerprint()
+            if self._cached_servers is None or fingerprint != self._cached_fingerprint:
+                self._cached_servers = self._discover_uncached()
+                # Port collision handling may rewrite registry files, so fingerprint afterwards
+                self._cached_fingerprint = self._fingerprint()
+            cached = self._cached_servers
+        # Callers attach per-request data (e.g. proxied tools) and edit tool entries in place,
+        # so hand out copies down to the tool dicts
+        return [self._copy_server(s) for s in cached]
+
+    @staticmethod
+    def _copy_server(server: ServerInfo) -> ServerInfo:
+        """Copy a cached entry along with its tools list and tool dicts."""
+        server = copy.copy(server)
+        if server.tools:
+            server.tools = [dict(t) for t in server.tools]
+        return server
+
+    def invalidate(self) -> None:
+        """Drop the cached discovery results so the next discover() rescans the registry."""
+        with self._cache_lock:
+            self._cached_servers = None
+            self._cached_fingerprint = None
+
+    def _fingerprint(self) -> Tuple:
+        """Return (name, mtime) pairs for all registry files."""
+        if not self.registry_path.exists():
+            return ()
+        return tuple(sorted((e.name, e.stat().st_mtime_ns) for e in self._registry_entries(self.registry_path)))
+
+    @staticmethod
+    def _registry_entries(registry_dir: Path) -> List[os.DirEntry]:
+        """List registry YAML files in a single directory read."""
+        with os.scandir(registry_dir) as it:
+            return [e for e in it if e.name.endswith(".yaml") and e.is_file(follow_symlinks=False)]
+
+    def _discover_uncached(self) -> List[ServerInfo]:
+        """Scan and parse the registry/ folder."""
         servers = []
         try:
             if self.registry_path.exists():
-                servers.extend(self._discover_from_registry(self.registry_path))
+                now_iso = datetime.now().isoformat()
+                servers.extend(self._discover_from_registry(self.registry_path, now_iso))
             
             unique_servers = {f"{s.name}_{s.path}": s for s in servers}
             servers_list = list(unique_servers.values())
@@ -36,28 +93,53 @@ class RegistryDiscoverer(IServerDiscoverer):
             logger.error(f"Error during server discovery: {e}")
             return []
 
-    def _discover_from_registry(self, registry_dir: Path) -> List[ServerInfo]:
+    def _discover_from_registry(self, registry_dir: Path, now_iso: str) -> List[ServerInfo]:
         """Discover servers by reading all YAML files in the registry folder."""
-        servers = []
-        for entry in registry_dir.glob("*.yaml"):
-            try:
-                with open(entry, "r") as f:
-                    config = yaml.safe_load(f)
-                
-                server_type = config.get("type", "local")
-                if server_type == "github":
-                    servers.append(self._process_github_server(config))
-                elif server_type == "local":
-                    servers.append(self._process_local_server(config))
-                elif server_type == "remote":
-                    servers.append(self._process_remote_server(config))
-
-            except Exception as e:
-                logger.warning(f"Error loading registry entry {entry}: {e}")
-        
-        return [s for s in servers if s]
+        self._name_to_file = {}
+        self._name_to_config = {}
+        entries = self._registry_entries(registry_dir)
+        # Parsing files and cloning/pulling GitHub entries are independent per entry;
+        # GitManager serializes git operations on the same working tree.
+        with ThreadPoolExecutor(max_workers=min(8, len(entries) or 1)) as pool:
+            loaded = list(pool.map(self._load_registry_file, entries))
+
+            for entry, config in loaded:
+                name = config.get("name") if isinstance(config, dict) else None
+                if name:
+                    self._name_to_file[name] = Path(entry.path)
+                    self._name_to_config[name] = config
+
+            processed = list(pool.map(lambda item: self._process_entry(item[0], item[1], now_iso), loaded))
+
+        return [s for s in processed if s]
 
-    def _process_github_server(self, config: Dict[str, Any]) -> Optional[ServerInfo]:
+    def _process_entry(self, entry: os.DirEntry, config: Optional[Dict[str, Any]], now_iso: str) -> Optional[ServerInfo]:
+        """Build a ServerInfo from one parsed registry file."""
+        if config is None:
+            return None
+        try:
+            server_type = config.get("type", "local")
+            if server_type == "github":
+                return self._process_github_server(config, now_iso)
+            elif server_type == "local":
+                return self._process_local_server(config, now_iso)
+            elif server_type == "remote":
+                return self._process_remote_server(config, now_iso)
+        except Exception as e:
+            logger.warning(f"Error loading registry entry {entry.path}: {e}")
+        return None
+
+    @staticmethod
+    def _load_registry_file(entry: os.DirEntry) -> Tuple[os.DirEntry, Optional[Dict[str, Any]]]:
+        """Read and parse a single registry file."""
+        try:
+            with open(entry.path, "rb") as f:
+                return entry, yaml.load(f.read(), Loader=_YamlLoader)
+        except Exception as e:
+            logger.warning(f"Error loading registry entry {entry.path}: {e}")
+            return entry, None
+
+    def _process_github_server(self, config: Dict[str, Any], now_iso: str) -> Optional[ServerInfo]:
         """Process a server of type 'github'."""
         name = config.get("name")
         repo = config.get("repo")
@@ -87,12 +169,12 @@ class RegistryDiscoverer(IServerDiscoverer):
             tools=tools,
             status=status,
             discovery_method="github",
-            last_discovered=datetime.now().isoformat(),
+            last_discovered=now_iso,
             port=config.get("port"),
             health_check_url=config.get("health_check_url")
         )
 
-    def _process_local_server(self, config: Dict[str, Any]) -> Optional[ServerInfo]:
+    def _process_local_server(self, config: Dict[str, Any], now_iso: str) -> Optional[ServerInfo]:
         """Process a server of type 'local'."""
         name = config.get("name")
         path = config.get("path")
@@ -113,12 +195,12 @@ class RegistryDiscoverer(IServerDiscoverer):
             tools=tools,
             status="discovered" if config.get("enabled", True) else "disabled",
             discovery_method="registry",
-            last_discovered=datetime.now().isoformat(),
+            last_discovered=now_iso,
             port=config.get("port"),
             health_check_url=config.get("health_check_url")
         )
 
-    def _process_remote_server(self, config: Dict[str, Any]) -> Optional[ServerInfo]:
+    def _process_remote_server(self, config: Dict[str, Any], now_iso: str) -> Optional[ServerInfo]:
         """Process a server of type 'remote'."""
         name = config.get("name")
         url = config.get("url")
@@ -134,17 +216,21 @@ class RegistryDiscoverer(IServerDiscoverer):
             tools=[], # Tools will be fetched via proxy on-demand.
             status="discovered" if config.get("enabled", True) else "disabled",
             discovery_method="registry",
-            last_discovered=datetime.now().isoformat(),
+            last_discovered=now_iso,
             port=config.get("port"),
             health_check_url=config.get("health_check_url")
         )
     
     def _find_server_command(self, server_dir: Path) -> List[str]:
         """Find the primary server script in a directory."""
-        for script_name in ["server_stdio.py", "server.py", "server_http.py", "main.py"]:
-            script_path = server_dir / script_name
-            if script_path.exists():
-                return ["python", str(script_path.relative_to(self.workspace_root))]
+        try:
+            with os.scandir(server_dir) as it:
+                names = {e.name for e in it if e.is_file()}
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        for script_name in ("server_stdio.py", "server.py", "server_http.py", "main.py"):
+            if script_name in names:
+                return ["python", str((server_dir / script_name).relative_to(self.workspace_root))]
         return []
 
     def _merge_tool_states(self, discovered_tools: List[Dict], registry_tools: List[Dict]) -> List[Dict]:
@@ -208,27 +294,16 @@ class RegistryDiscoverer(IServerDiscoverer):
     def _assign_port_to_server(self, server: ServerInfo, new_port: int) -> None:
         """Assign a new port to a server, updating its registry file."""
         server.port = new_port
-        registry_file = self.registry_path / f"{server.discovery_method}-{server.name}.yaml" # This assumes a file naming convention that may not exist. A better approach would be to find file by name property
-        
-        # A better approach
-        found_file = None
-        for entry in self.registry_path.glob("*.yaml"):
-             with open(entry, "r") as f:
-                config = yaml.safe_load(f)
-                if config.get("name") == server.name:
-                    found_file = entry
-                    break
-        
-        if not found_file:
+        found_file = self._name_to_file.get(server.name)
+        config = self._name_to_config.get(server.name)
+
+        if not found_file or config is None:
             logger.warning(f"Could not find registry file for server '{server.name}' to update port.")
             return
 
-        with open(found_file, 'r') as f:
-            config = yaml.safe_load(f)
-        
         config["port"] = new_port
         
         with open(found_file, 'w') as f:
-            yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            yaml.dump(config, f, Dumper=_YamlDumper, default_flow_style=False, sort_keys=False)
         
         logger.info(f"Updated port for '{server.name}' to {new_port} in {found_file.name}") 
\ No newline at end of file
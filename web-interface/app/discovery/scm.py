@@ -1,30 +1,52 @@
 import logging
 import subprocess
+import threading
 from pathlib import Path
+from typing import Dict
 
 logger = logging.getLogger(__name__)
 
 class GitManager:
     """Manages Git operations for cloning and updating repositories."""
 
+    def __init__(self):
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, local_path: Path) -> threading.Lock:
+        """Returns the lock serializing git operations on one working tree."""
+        key = local_path.resolve()
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
     def ensure_repo(self, repo_url: str, branch: str, local_path: Path) -> bool:
         """
         Ensures a GitHub repository is cloned or updated to the specified branch.
-        Returns True if successful, False otherwise.
+        Returns True if successful, False otherwise. Safe to call from several threads.
         """
-        if local_path.exists():
-            logger.info(f"Updating existing GitHub repository: {local_path.name}")
-            return self._update_repo(branch, local_path)
-        else:
-            logger.info(f"Cloning new GitHub repository: {local_path.name}")
-            return self._clone_repo(repo_url, branch, local_path)
+        with self._lock_for(local_path):
+            if local_path.exists():
+                logger.info(f"Updating existing GitHub repository: {local_path.name}")
+                return self._update_repo(branch, local_path)
+            else:
+                logger.info(f"Cloning new GitHub repository: {local_path.name}")
+                return self._clone_repo(repo_url, branch, local_path)
+
+    @staticmethod
+    def _is_on_branch(branch: str, local_path: Path) -> bool:
+        """Checks HEAD without spawning git; False if it can't be determined."""
+        try:
+            head = (local_path / ".git" / "HEAD").read_text().strip()
+        except OSError:
+            return False
+        return head == f"ref: refs/heads/{branch}"
 
     def _clone_repo(self, repo_url: str, branch: str, local_path: Path) -> bool:
         """Clones a new GitHub repository."""
         local_path.parent.mkdir(parents=True, exist_ok=True)
         try:
             subprocess.run(
-                ["git", "clone", "--branch", branch, repo_url, str(local_path)],
+                ["git", "clone", "--depth", "1", "--no-single-branch", "--branch", branch, repo_url, str(local_path)],
                 check=True,
                 capture_output=True,
                 text=True
@@ -38,22 +60,24 @@ class GitManager:
     def _update_repo(self, branch: str, local_path: Path) -> bool:
         """Updates an existing GitHub repository."""
         try:
+            if not self._is_on_branch(branch, local_path):
+                subprocess.run(
+                    ["git", "fetch", "origin", branch],
+                    cwd=local_path,
+                    check=True,
+                    capture_output=True,
+                    text=True
+                )
+                subprocess.run(
+                    ["git", "checkout", branch],
+                    cwd=local_path,
+                    check=True,
+                    capture_output=True,
+                    text=True
+                )
+            # Already on the branch (the usual case): a single pull fetches and fast-forwards
             subprocess.run(
-                ["git", "fetch", "origin", branch],
-                cwd=local_path,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            subprocess.run(
-                ["git", "checkout", branch],
-                cwd=local_path,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            subprocess.run(
-                ["git", "pull", "origin", branch],
+                ["git", "pull", "--ff-only", "origin", branch],
                 cwd=local_path,
                 check=True,
                 capture_output=True,
@@ -1,33 +1,60 @@
-import json
-from flask import jsonify
+import inspect
+from concurrent.futures import ThreadPoolExecutor
 
+from app.core.serialization import dumps_pretty
 from app.virtual.manager import VirtualServerManager
 from app.discovery.base import IServerDiscoverer
 from app.prompts.manager import PromptManager
 
+JSONRPC_VERSION = '2.0'
+
+# Capability kinds understood by VirtualServerManager.fetch_server_capabilities
+CAP_PROMPTS = 'prompts'
+CAP_RESOURCES = 'resources'
+CAP_RESOURCE_TEMPLATES = 'resource_templates'
+
+def _ok(result, request_id):
+    """Build a JSON-RPC success response."""
+    return {'jsonrpc': JSONRPC_VERSION, 'result': result, 'id': request_id}
+
+def _err(code, message, request_id):
+    """Build a JSON-RPC error response."""
+    return {'jsonrpc': JSONRPC_VERSION, 'error': {'code': code, 'message': message}, 'id': request_id}
+
+# Shared pool for fanning capability requests out to a virtual server's underlying servers
+_CAP_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix='mcp-caps')
+
+def _fetch_underlying_capabilities(server, capability_type, vsm: VirtualServerManager, discoverer: IServerDiscoverer):
+    """Fetch one capability type from every underlying server of a virtual server concurrently."""
+    underlying_server_names = sorted({t.get('server_name') for t in server.selected_tools if t.get('server_name')})
+    futures = [_CAP_POOL.submit(vsm.fetch_server_capabilities, name, capability_type, discoverer)
+               for name in underlying_server_names]
+    items = []
+    for future in futures:
+        result = future.result()
+        if result:
+            items.extend(result)
+    return items
+
 def handle_initialize(server, params, request_id):
     """Handles the 'initialize' MCP method."""
-    return {
-        'jsonrpc': '2.0',
-        'result': {
-            'protocolVersion': '2024-11-05',
-            'capabilities': {
-                'tools': {'listChanged': False},
-                'prompts': {'listChanged': False},
-                'resources': {'subscribe': False, 'listChanged': False}
-            },
-            'serverInfo': {
-                'name': f'MCP Proxy - {server.name}',
-                'version': '1.0.0'
-            }
+    return _ok({
+        'protocolVersion': '2024-11-05',
+        'capabilities': {
+            'tools': {'listChanged': False},
+            'prompts': {'listChanged': False},
+            'resources': {'subscribe': False, 'listChanged': False}
         },
-        'id': request_id
-    }
+        'serverInfo': {
+            'name': f'MCP Proxy - {server.name}',
+            'version': '1.0.0'
+        }
+    }, request_id)
 
 def handle_tools_list(server, params, request_id, vsm: VirtualServerManager, prompt_manager: PromptManager, tool_proxy_router: 'ToolProxyRouter'):
     """Handles the 'tools/list' MCP method."""
     # For virtual servers, we need to synthesize the tool list
-    if hasattr(server, 'selected_tools'):
+    if server.is_virtual:
         tools = []
         # 1. Add real tools from the selection
         for tool_config in server.selected_tools:
@@ -63,7 +90,7 @@ def handle_tools_list(server, params, request_id, vsm: VirtualServerManager, pro
         # For real servers, proxy the request to get the tool list
         tools = tool_proxy_router.list_tools(server)
 
-    return {'jsonrpc': '2.0', 'result': {'tools': tools}, 'id': request_id}
+    return _ok({'tools': tools}, request_id)
 
 def handle_tools_call(server, params, request_id, vsm: VirtualServerManager, discoverer: IServerDiscoverer, tool_proxy_router: 'ToolProxyRouter', prompt_manager: PromptManager):
     """Handles the 'tools/call' MCP method."""
@@ -71,60 +98,52 @@ def handle_tools_call(server, params, request_id, vsm: VirtualServerManager, dis
     arguments = params.get('arguments', {})
 
     if not tool_name:
-        return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': 'Missing tool name'}, 'id': request_id}
+        return _err(-32602, 'Missing tool name', request_id)
 
     try:
         # Check if the tool is a custom prompt
-        is_prompt = hasattr(server, 'selected_prompts') and server.selected_prompts and tool_name in server.selected_prompts
+        is_prompt = server.is_virtual and server.has_prompt(tool_name)
         
         if is_prompt:
             prompt = prompt_manager.get_prompt(tool_name)
             if not prompt:
-                 return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': f'Prompt-based tool "{tool_name}" not found'}, 'id': request_id}
+                 return _err(-32602, f'Prompt-based tool "{tool_name}" not found', request_id)
 
             # Render the prompt template
-            rendered_text = prompt.prompt_template
-            for var, value in arguments.items():
-                rendered_text = rendered_text.replace(f'{{{{{var}}}}}', str(value))
+            rendered_text = prompt.render(arguments)
             
             result = {"rendered_prompt": rendered_text}
         else:
             # For standard tools, find the underlying server and proxy the call
-            if not hasattr(server, 'selected_tools'):
-                 return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': f'Tool "{tool_name}" cannot be executed on a non-virtual server'}, 'id': request_id}
+            if not server.is_virtual:
+                 return _err(-32602, f'Tool "{tool_name}" cannot be executed on a non-virtual server', request_id)
 
-            tool_config = next((t for t in server.selected_tools if t['tool_name'] == tool_name), None)
+            tool_config = server.get_selected_tool(tool_name)
             if not tool_config:
-                return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': f'Tool "{tool_name}" not found in this virtual server'}, 'id': request_id}
+                return _err(-32602, f'Tool "{tool_name}" not found in this virtual server', request_id)
             
             source_server_name = tool_config.get('server_name')
             source_server = vsm.get_server(source_server_name, discoverer)
             if not source_server:
-                return {'jsonrpc': '2.0', 'error': {'code': -32603, 'message': f'Underlying server "{source_server_name}" not found'}, 'id': request_id}
+                return _err(-32603, f'Underlying server "{source_server_name}" not found', request_id)
             
             result = tool_proxy_router.execute_tool(source_server, tool_config['tool_name'], arguments)
         
-        content = [{'type': 'text', 'text': json.dumps(result, indent=2) if isinstance(result, dict) else str(result)}]
+        content = [{'type': 'text', 'text': dumps_pretty(result) if isinstance(result, dict) else str(result)}]
         is_error = result.get('status') == 'error' if isinstance(result, dict) else False
-        return {'jsonrpc': '2.0', 'result': {'content': content, 'isError': is_error}, 'id': request_id}
+        return _ok({'content': content, 'isError': is_error}, request_id)
 
     except Exception as e:
-        return {'jsonrpc': '2.0', 'error': {'code': -32603, 'message': f'Tool execution failed: {str(e)}'}, 'id': request_id}
+        return _err(-32603, f'Tool execution failed: {str(e)}', request_id)
 
 def handle_prompts_list(server, params, request_id, vsm: VirtualServerManager, discoverer: IServerDiscoverer, prompt_manager: PromptManager):
     """Handles the 'prompts/list' MCP method by aggregating from all sources."""
     prompts = []
     
     # For virtual servers, aggregate prompts from underlying servers and custom prompts
-    if hasattr(server, 'selected_tools'):
+    if server.is_virtual:
         # 1. Get prompts from all unique underlying real servers
-        underlying_server_names = {t.get('server_name') for t in server.selected_tools if t.get('server_name')}
-        
-        for server_name in underlying_server_names:
-            # Use the existing capability fetching logic which proxies the request
-            server_prompts = vsm.fetch_server_capabilities(server_name, 'prompts', discoverer)
-            if server_prompts:
-                prompts.extend(server_prompts)
+        prompts.extend(_fetch_underlying_capabilities(server, CAP_PROMPTS, vsm, discoverer))
 
         # 2. Add selected custom prompts
         if server.selected_prompts:
@@ -138,9 +157,9 @@ def handle_prompts_list(server, params, request_id, vsm: VirtualServerManager, d
                     })
     # For real servers, just proxy the request
     else:
-        prompts = vsm.fetch_server_capabilities(server.name, 'prompts', discoverer)
+        prompts = vsm.fetch_server_capabilities(server.name, CAP_PROMPTS, discoverer)
         
-    return {'jsonrpc': '2.0', 'result': {'prompts': prompts}, 'id': request_id}
+    return _ok({'prompts': prompts}, request_id)
 
 
 def handle_prompts_get(server, params, request_id, vsm: VirtualServerManager, discoverer: IServerDiscoverer):
@@ -148,64 +167,50 @@ def handle_prompts_get(server, params, request_id, vsm: VirtualServerManager, di
     prompt_name = params.get('name')
     arguments = params.get('arguments', {})
     if not prompt_name:
-        return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': 'Missing required parameter: name'}, 'id': request_id}
+        return _err(-32602, 'Missing required parameter: name', request_id)
     
     prompt_content = vsm.get_prompt_content(server.name, prompt_name, arguments, discoverer)
     if prompt_content is None:
-        return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': f"Prompt '{prompt_name}' not found"}, 'id': request_id}
+        return _err(-32602, f"Prompt '{prompt_name}' not found", request_id)
     
-    return {
-        'jsonrpc': '2.0',
-        'result': {
-            'description': prompt_content.get('description', ''),
-            'messages': [{'role': 'user', 'content': {'type': 'text', 'text': prompt_content.get('content', '')}}]
-        },
-        'id': request_id
-    }
+    return _ok({
+        'description': prompt_content.get('description', ''),
+        'messages': [{'role': 'user', 'content': {'type': 'text', 'text': prompt_content.get('content', '')}}]
+    }, request_id)
 
 def handle_resources_list(server, params, request_id, vsm: VirtualServerManager, discoverer: IServerDiscoverer):
     """Handles the 'resources/list' MCP method by aggregating from all sources."""
     resources = []
     
     # For virtual servers, aggregate resources from underlying servers
-    if hasattr(server, 'selected_tools'):
-        underlying_server_names = {t.get('server_name') for t in server.selected_tools if t.get('server_name')}
-        
-        for server_name in underlying_server_names:
-            server_resources = vsm.fetch_server_capabilities(server_name, 'resources', discoverer)
-            if server_resources:
-                resources.extend(server_resources)
+    if server.is_virtual:
+        resources.extend(_fetch_underlying_capabilities(server, CAP_RESOURCES, vsm, discoverer))
     # For real servers, just proxy the request
     else:
-        resources = vsm.fetch_server_capabilities(server.name, 'resources', discoverer)
+        resources = vsm.fetch_server_capabilities(server.name, CAP_RESOURCES, discoverer)
         
-    return {'jsonrpc': '2.0', 'result': {'resources': resources}, 'id': request_id}
+    return _ok({'resources': resources}, request_id)
 
 def handle_resources_read(server, params, request_id):
     """Handles the 'resources/read' MCP method."""
-    return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': 'Resource reading not yet implemented'}, 'id': request_id}
+    return _err(-32602, 'Resource reading not yet implemented', request_id)
 
 def handle_resource_templates_list(server, params, request_id, vsm: VirtualServerManager, discoverer: IServerDiscoverer):
     """Handles the 'resources/templates/list' MCP method by aggregating from all sources."""
     templates = []
 
     # For virtual servers, aggregate templates from underlying servers
-    if hasattr(server, 'selected_tools'):
-        underlying_server_names = {t.get('server_name') for t in server.selected_tools if t.get('server_name')}
-        
-        for server_name in underlying_server_names:
-            server_templates = vsm.fetch_server_capabilities(server_name, 'resource_templates', discoverer)
-            if server_templates:
-                templates.extend(server_templates)
+    if server.is_virtual:
+        templates.extend(_fetch_underlying_capabilities(server, CAP_RESOURCE_TEMPLATES, vsm, discoverer))
     # For real servers, just proxy the request
     else:
-        templates = vsm.fetch_server_capabilities(server.name, 'resource_templates', discoverer)
+        templates = vsm.fetch_server_capabilities(server.name, CAP_RESOURCE_TEMPLATES, discoverer)
 
-    return {'jsonrpc': '2.0', 'result': {'resourceTemplates': templates}, 'id': request_id}
+    return _ok({'resourceTemplates': templates}, request_id)
 
 def handle_ping(server, params, request_id):
     """Handles the 'ping' MCP method."""
-    return {'jsonrpc': '2.0', 'result': {}, 'id': request_id}
+    return _ok({}, request_id)
 
 # Dispatcher for MCP methods
 MCP_METHOD_HANDLERS = {
@@ -219,3 +224,10 @@ MCP_METHOD_HANDLERS = {
     'resources/templates/list': handle_resource_templates_list,
     'ping': handle_ping,
 }
+
+# Injectable dependencies each handler declares, resolved once instead of per request
+_INJECTABLE_DEPS = frozenset({'vsm', 'discoverer', 'tool_proxy_router', 'prompt_manager'})
+MCP_HANDLER_DEPS = {
+    name: frozenset(inspect.signature(handler).parameters) & _INJECTABLE_DEPS
+    for name, handler in MCP_METHOD_HANDLERS.items()
+}
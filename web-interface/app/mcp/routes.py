@@ -1,11 +1,12 @@
 import uuid
-import json
 import queue
 import secrets
 import threading
 import hmac
-from flask import Blueprint, request, jsonify, g, Response, stream_with_context
-from .handlers import MCP_METHOD_HANDLERS
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, g, Response, stream_with_context
+from app.core.serialization import dumps, loads, json_response
+from .handlers import MCP_METHOD_HANDLERS, MCP_HANDLER_DEPS
 
 mcp_bp = Blueprint('mcp', __name__)
 mcp_sse_bp = Blueprint('mcp_sse', __name__)
@@ -14,20 +15,27 @@ mcp_sse_bp = Blueprint('mcp_sse', __name__)
 sse_queues = {}
 sse_queues_lock = threading.Lock()
 
-def _validate_server(server_name):
-    """Helper to find and validate a virtual server."""
-    server = g.virtual_server_manager.get_virtual_server(server_name)
-    if not server:
-        return None, jsonify({'error': f'Server {server_name} not found.'}), 404
-    if not server.enabled:
-        err = {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': f'Server "{server_name}" is disabled'}, 'id': None}
-        return None, jsonify(err), 403
-    return server, None, None
-
-def _process_json_rpc_request(server, data):
-    """Processes a single JSON-RPC request object using the handler dispatch."""
+_REQUIRED_RPC_KEYS = frozenset({'jsonrpc', 'method', 'id'})
+
+# Batch entries are dispatched concurrently; most handlers block on proxied I/O
+_BATCH_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix='mcp-batch')
+
+def _request_dependencies():
+    """Capture the injectable handler dependencies from the request context."""
+    return {
+        'vsm': g.virtual_server_manager,
+        'discoverer': g.server_discovery,
+        'tool_proxy_router': g.tool_proxy_router,
+        'prompt_manager': g.prompt_manager,
+    }
+
+def _process_json_rpc_request(server, data, deps):
+    """
+    Processes a single JSON-RPC request object using the handler dispatch.
+    deps comes from _request_dependencies(), so this can run outside the request context.
+    """
     # Basic validation
-    if not all(k in data for k in ['jsonrpc', 'method', 'id']):
+    if not isinstance(data, dict) or not data.keys() >= _REQUIRED_RPC_KEYS:
         return {'jsonrpc': '2.0', 'error': {'code': -32600, 'message': 'Invalid Request'}, 'id': None}
 
     method = data['method']
@@ -38,29 +46,26 @@ def _process_json_rpc_request(server, data):
     if not handler:
         return {'jsonrpc': '2.0', 'error': {'code': -32601, 'message': 'Method not found'}, 'id': request_id}
 
-    # Build a dictionary of dependencies to inject into the handler
-    kwargs = {}
-    handler_params = handler.__code__.co_varnames
-    
-    if 'vsm' in handler_params:
-        kwargs['vsm'] = g.virtual_server_manager
-    if 'discoverer' in handler_params:
-        kwargs['discoverer'] = g.server_discovery
-    if 'tool_proxy_router' in handler_params:
-        kwargs['tool_proxy_router'] = g.tool_proxy_router
-    if 'prompt_manager' in handler_params:
-        kwargs['prompt_manager'] = g.prompt_manager
+    # Inject only the dependencies this handler declares
+    kwargs = {dep: deps[dep] for dep in MCP_HANDLER_DEPS[method]}
         
     result = handler(server, params, request_id, **kwargs)
     return result
 
+def _parse_json_body():
+    """Parse the raw request body as JSON, returning None if it is missing or malformed."""
+    body = request.get_data(cache=False)
+    if not body:
+        return None
+    try:
+        return loads(body)
+    except ValueError:
+        return None
+
 def _get_server_from_name(server_name: str):
     """Helper to get a server by name, checking both virtual and registry."""
-    server = g.virtual_server_manager.get_virtual_server(server_name)
-    if not server:
-        # If not a virtual server, check registry entries
-        server = g.virtual_server_manager.get_server(server_name, g.server_discovery)
-    return server
+    # get_server tries the virtual servers first, then the registry entries
+    return g.virtual_server_manager.get_server(server_name, g.server_discovery)
 
 def get_auth_key(request):
     auth_header = request.headers.get('Authorization')
@@ -79,7 +84,7 @@ def mcp_transport(server_name: str):
     """Handles standard MCP requests (single or batch)."""
     server = _get_server_from_name(server_name)
     if not server:
-        return jsonify({'error': 'Server not found'}), 404
+        return json_response({'error': 'Server not found'}, 404)
 
     # --- Authentication Check ---
     if hasattr(server, 'config') and server.config:
@@ -90,29 +95,31 @@ def mcp_transport(server_name: str):
     if required_key:
         provided_key, err = get_auth_key(request)
         if err:
-            return jsonify(err), 401
+            return json_response(err, 401)
         
         if not provided_key or not hmac.compare_digest(provided_key, required_key):
             err = {'jsonrpc': '2.0', 'error': {'code': -32001, 'message': 'Authentication error: Invalid API Key'}, 'id': None}
-            return jsonify(err), 401
+            return json_response(err, 401)
     # If server has no key, allow request for backward compatibility.
         
     if request.method == 'GET' or request.method == 'HEAD':
         # Handle HEAD requests for capability checks
         return '', 200
 
-    data = request.get_json()
+    data = _parse_json_body()
     if not data:
-        return jsonify({'error': 'Invalid JSON body'}), 400
+        return json_response({'error': 'Invalid JSON body'}, 400)
 
     if isinstance(data, list):
         # Batch request
-        responses = [_process_json_rpc_request(server, req) for req in data]
-        return jsonify(responses)
+        deps = _request_dependencies()
+        futures = [_BATCH_POOL.submit(_process_json_rpc_request, server, req, deps) for req in data]
+        responses = [f.result() for f in futures]
+        return json_response(responses)
     else:
         # Single request
-        response = _process_json_rpc_request(server, data)
-        return jsonify(response)
+        response = _process_json_rpc_request(server, data, _request_dependencies())
+        return json_response(response)
 
 @mcp_sse_bp.route('/<server_name>', methods=['POST'])
 def mcp_streamable_transport(server_name: str):
@@ -120,7 +127,7 @@ def mcp_streamable_transport(server_name: str):
     server = _get_server_from_name(server_name)
     if not server:
         # SSE needs a response object to report the error
-        return Response(json.dumps({'error': 'Server not found'}), status=404, mimetype='application/json')
+        return json_response({'error': 'Server not found'}, 404)
 
     # --- Authentication Check ---
     if hasattr(server, 'config') and server.config:
@@ -131,19 +138,21 @@ def mcp_streamable_transport(server_name: str):
     if required_key:
         provided_key, err = get_auth_key(request)
         if err:
-            return Response(json.dumps(err), status=401, mimetype='application/json')
+            return json_response(err, 401)
 
         if not provided_key or not hmac.compare_digest(provided_key, required_key):
             err = {'jsonrpc': '2.0', 'error': {'code': -32001, 'message': 'Authentication error: Invalid API Key'}, 'id': None}
-            return Response(json.dumps(err), status=401, mimetype='application/json')
+            return json_response(err, 401)
 
-    data = request.get_json()
+    data = _parse_json_body()
     if not data:
-        return Response(json.dumps({'error': 'Invalid JSON body'}), status=400, mimetype='application/json')
+        return json_response({'error': 'Invalid JSON body'}, 400)
+
+    deps = _request_dependencies()
 
     def stream():
         """Generator function for the SSE stream."""
-        response_dict = _process_json_rpc_request(server, data)
-        yield f"data: {json.dumps(response_dict)}\n\n"
+        response_dict = _process_json_rpc_request(server, data, deps)
+        yield b"data: " + dumps(response_dict) + b"\n\n"
     
-    return Response(stream(), mimetype='text/event-stream')
+    return Response(stream(), mimetype='text/event-stream', direct_passthrough=True)
@@ -1,6 +1,9 @@
 import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# Template variables look like {{variable_name}}
+_VAR_RE = re.compile(r'\{\{([a-zA-Z0-9_]+)\}\}')
 
 class CustomPrompt:
     """
@@ -22,6 +25,7 @@ class CustomPrompt:
         self.id = id
         self.name = name
         self.description = description
+        self._input_vars_cache: Optional[List[str]] = None
         self.prompt_template = prompt_template
         self.category = category
         
@@ -29,20 +33,38 @@ class CustomPrompt:
         self.created_at = created_at or now
         self.updated_at = updated_at or now
 
+    @property
+    def prompt_template(self) -> str:
+        return self._prompt_template
+
+    @prompt_template.setter
+    def prompt_template(self, value: str) -> None:
+        self._prompt_template = value
+        self._input_vars_cache = None
+
     @property
     def input_variables(self) -> List[str]:
         """
         Parses the prompt template to find all unique input variables.
         Variables are identified by the pattern {{variable_name}}.
+        The result is cached until the template changes.
+        """
+        if self._input_vars_cache is None:
+            if not self.prompt_template:
+                self._input_vars_cache = []
+            else:
+                self._input_vars_cache = sorted(set(_VAR_RE.findall(self.prompt_template)))
+        return self._input_vars_cache
+
+    def render(self, arguments: Dict[str, Any]) -> str:
+        """
+        Substitutes {{variable}} placeholders with the given arguments in a single pass.
+        Placeholders without a matching argument are left as-is.
         """
         if not self.prompt_template:
-            return []
-        
-        # Find all occurrences of {{variable}}
-        variables = re.findall(r'\{\{([a-zA-Z0-9_]+)\}\}', self.prompt_template)
-        
-        # Return a list of unique variable names
-        return sorted(list(set(variables)))
+            return self.prompt_template or ""
+        return _VAR_RE.sub(lambda m: str(arguments[m.group(1)]) if m.group(1) in arguments else m.group(0),
+                           self.prompt_template)
 
     def to_dict(self) -> Dict[str, Any]:
         """Serializes the prompt object to a dictionary for storage."""
@@ -1,5 +1,7 @@
 import yaml
 import os
+import threading
+import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import logging
@@ -7,56 +9,121 @@ from datetime import datetime
 
 from .prompt import CustomPrompt
 
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
 logger = logging.getLogger(__name__)
 
 class YAMLPromptStorage:
     """
     Manages the persistence of CustomPrompt objects to YAML files.
     Each prompt is stored in its own file within the configured directory.
+    Prompts are kept in memory; files edited outside the app are picked up by an
+    mtime check at most every `check_interval` seconds.
     """
-    def __init__(self, storage_path: str):
+    def __init__(self, storage_path: str, check_interval: float = 2.0):
         self.storage_path = Path(storage_path)
         if not self.storage_path.exists():
             logger.info(f"Creating prompt storage directory at: {self.storage_path}")
             self.storage_path.mkdir(parents=True)
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._cache: Dict[str, CustomPrompt] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._last_check = 0.0
+        self._refresh(force=True)
 
     def _get_filepath(self, prompt_id: str) -> Path:
         """Constructs the full path for a given prompt ID."""
         return self.storage_path / f"{prompt_id}.yaml"
 
+    def _read_file(self, filepath: str) -> Optional[CustomPrompt]:
+        """Parses a single prompt file."""
+        try:
+            with open(filepath, 'rb') as f:
+                data = yaml.load(f.read(), Loader=_YamlLoader)
+            return CustomPrompt.from_dict(data)
+        except (IOError, ValueError, AttributeError, yaml.YAMLError) as e:
+            logger.error(f"Error reading or parsing prompt file {filepath}: {e}")
+            return None
+
+    def _refresh(self, force: bool = False) -> None:
+        """Re-reads prompt files that were added, changed or removed since the last check."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+
+            seen = set()
+            with os.scandir(self.storage_path) as it:
+                for entry in it:
+                    if not entry.name.endswith('.yaml') or not entry.is_file():
+                        continue
+                    prompt_id = entry.name[:-len('.yaml')]
+                    seen.add(prompt_id)
+                    mtime = entry.stat().st_mtime_ns
+                    if self._mtimes.get(prompt_id) == mtime:
+                        continue
+                    self._mtimes[prompt_id] = mtime
+                    prompt = self._read_file(entry.path)
+                    if prompt:
+                        self._cache[prompt_id] = prompt
+                    else:
+                        self._cache.pop(prompt_id, None)
+
+            for prompt_id in set(self._mtimes) - seen:
+                del self._mtimes[prompt_id]
+                self._cache.pop(prompt_id, None)
+
+    @staticmethod
+    def _copy(prompt: CustomPrompt) -> CustomPrompt:
+        """Copy a prompt so callers' edits never reach the cache before a successful save."""
+        return CustomPrompt.from_dict(prompt.to_dict())
+
+    def _record(self, prompt_id: str) -> None:
+        """Remembers the current mtime of a file this instance just wrote."""
+        try:
+            self._mtimes[prompt_id] = self._get_filepath(prompt_id).stat().st_mtime_ns
+        except OSError:
+            self._mtimes.pop(prompt_id, None)
+
     def save(self, prompt: CustomPrompt) -> None:
         """Saves a single prompt to a YAML file."""
         filepath = self._get_filepath(prompt.id)
         prompt.updated_at = datetime.utcnow().isoformat()
-        try:
-            with open(filepath, 'w') as f:
-                yaml.dump(prompt.to_dict(), f, default_flow_style=False, sort_keys=False)
-            logger.info(f"Saved prompt '{prompt.id}' to {filepath}")
-        except IOError as e:
-            logger.error(f"Error saving prompt '{prompt.id}' to {filepath}: {e}")
-            raise
+        with self._lock:
+            # Write to a temp file and rename over the target so readers never see a partial file
+            tmp_path = filepath.with_suffix('.yaml.tmp')
+            try:
+                with open(tmp_path, 'w') as f:
+                    yaml.dump(prompt.to_dict(), f, Dumper=_YamlDumper, default_flow_style=False, sort_keys=False)
+                os.replace(tmp_path, filepath)
+                logger.info(f"Saved prompt '{prompt.id}' to {filepath}")
+            except IOError as e:
+                logger.error(f"Error saving prompt '{prompt.id}' to {filepath}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._cache[prompt.id] = self._copy(prompt)
+            self._record(prompt.id)
 
     def get(self, prompt_id: str) -> Optional[CustomPrompt]:
         """Retrieves a single prompt by its ID."""
-        filepath = self._get_filepath(prompt_id)
-        if not filepath.exists():
-            return None
-        try:
-            with open(filepath, 'r') as f:
-                data = yaml.safe_load(f)
-                return CustomPrompt.from_dict(data)
-        except (IOError, yaml.YAMLError) as e:
-            logger.error(f"Error reading or parsing prompt file {filepath}: {e}")
-            return None
+        self._refresh()
+        with self._lock:
+            prompt = self._cache.get(prompt_id)
+        return self._copy(prompt) if prompt else None
 
     def get_all(self) -> List[CustomPrompt]:
         """Retrieves all prompts from the storage directory."""
-        prompts = []
-        for filepath in self.storage_path.glob('*.yaml'):
-            prompt_id = filepath.stem
-            prompt = self.get(prompt_id)
-            if prompt:
-                prompts.append(prompt)
+        self._refresh()
+        with self._lock:
+            prompts = [self._copy(p) for p in self._cache.values()]
         # Sort prompts by name for consistent ordering
         prompts.sort(key=lambda p: p.name.lower())
         return prompts
@@ -67,10 +134,13 @@ class YAMLPromptStorage:
         if not filepath.exists():
             logger.warning(f"Attempted to delete non-existent prompt: {prompt_id}")
             return False
-        try:
-            os.remove(filepath)
-            logger.info(f"Deleted prompt file: {filepath}")
-            return True
-        except OSError as e:
-            logger.error(f"Error deleting prompt file {filepath}: {e}")
-            return False 
\ No newline at end of file
+        with self._lock:
+            try:
+                os.remove(filepath)
+                logger.info(f"Deleted prompt file: {filepath}")
+            except OSError as e:
+                logger.error(f"Error deleting prompt file {filepath}: {e}")
+                return False
+            self._cache.pop(prompt_id, None)
+            self._mtimes.pop(prompt_id, None)
+            return True 
\ No newline at end of file
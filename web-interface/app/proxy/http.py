@@ -1,16 +1,44 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import itertools
 import logging
-from datetime import datetime
-import json
 
 from app.core.models import ServerInfo
+from app.core.serialization import dumps, loads
 from app.proxy.base import ITransportHandler
 
 logger = logging.getLogger(__name__)
 
+# JSON-RPC request ids; next() on a count is atomic under the GIL
+_rpc_id = itertools.count(1)
+
 class HttpTransportHandler(ITransportHandler):
     """Handles tool execution proxying over HTTP."""
 
+    def __init__(self):
+        # One pooled session per handler so calls to the same MCP host reuse connections
+        self.session = requests.Session()
+        # Ride out MCP server restarts: retry refused connections only. Read errors and
+        # gateway statuses are not retried, since the server may already have executed
+        # the tool call and tools can have side effects.
+        retry = Retry(
+            total=3,
+            read=0,
+            status=0,
+            backoff_factor=0.2,
+            allowed_methods=frozenset(["POST"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=retry,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
     def proxy_list_tools(self, server: ServerInfo) -> list:
         """Proxy a tools/list request to an HTTP-based MCP server."""
         try:
@@ -20,20 +48,19 @@ class HttpTransportHandler(ITransportHandler):
 
             mcp_request = {
                 "jsonrpc": "2.0",
-                "id": f"list_tools_{datetime.now().timestamp()}",
+                "id": next(_rpc_id),
                 "method": "tools/list",
                 "params": {}
             }
 
-            response = requests.post(
+            response = self.session.post(
                 f"{base_url}/mcp",
-                json=mcp_request,
-                timeout=10,
-                headers={"Content-Type": "application/json"}
+                data=dumps(mcp_request),
+                timeout=10
             )
 
             response.raise_for_status()
-            result = response.json()
+            result = loads(response.content)
 
             if 'result' in result:
                 tool_data = result['result']
@@ -41,20 +68,20 @@ class HttpTransportHandler(ITransportHandler):
                 if isinstance(tool_data, dict):
                     return tool_data.get('tools', [])
                 
-                logger.error(f"MCP result for tools/list was not a dictionary: {tool_data}")
+                logger.error("MCP result for tools/list was not a dictionary: %s", tool_data)
                 return []
             elif 'error' in result:
-                logger.error(f"MCP server {server.name} returned an error for tools/list: {result['error']}")
+                logger.error("MCP server %s returned an error for tools/list: %s", server.name, result['error'])
                 return []
             else:
-                logger.error(f"Invalid tools/list response from server {server.name}")
+                logger.error("Invalid tools/list response from server %s", server.name)
                 return []
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"HTTP proxy error for {server.name} during tools/list: {e}")
+            logger.error("HTTP proxy error for %s during tools/list: %s", server.name, e)
             return []
         except Exception as e:
-            logger.error(f"Unexpected error in HTTP proxy for {server.name} during tools/list: {e}")
+            logger.error("Unexpected error in HTTP proxy for %s during tools/list: %s", server.name, e)
             return []
 
     def proxy_request(self, server: ServerInfo, tool_name: str, arguments: dict) -> dict:
@@ -66,20 +93,19 @@ class HttpTransportHandler(ITransportHandler):
             
             mcp_request = {
                 "jsonrpc": "2.0",
-                "id": f"{tool_name}_{datetime.now().timestamp()}",
+                "id": next(_rpc_id),
                 "method": "tools/call",
                 "params": {"name": tool_name, "arguments": arguments}
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{base_url}/mcp",
-                json=mcp_request,
-                timeout=30,
-                headers={"Content-Type": "application/json"}
+                data=dumps(mcp_request),
+                timeout=30
             )
             
             response.raise_for_status()
-            result = response.json()
+            result = loads(response.content)
 
             if 'result' in result:
                 return {'status': 'success', 'result': result['result']}
@@ -89,8 +115,8 @@ class HttpTransportHandler(ITransportHandler):
                 return {'status': 'error', 'message': 'Invalid response from server'}
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"HTTP proxy error for {server.name}: {e}")
+            logger.error("HTTP proxy error for %s: %s", server.name, e)
             return {'status': 'error', 'message': f'HTTP proxy error: {str(e)}'}
         except Exception as e:
-            logger.error(f"Unexpected error in HTTP proxy for {server.name}: {e}")
+            logger.error("Unexpected error in HTTP proxy for %s: %s", server.name, e)
             return {'status': 'error', 'message': f'An unexpected error occurred: {str(e)}'} 
\ No newline at end of file
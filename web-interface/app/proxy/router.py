@@ -1,5 +1,9 @@
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import copy
 import logging
+import threading
+import time
 
 from app.core.models import ServerInfo
 from app.proxy.base import ITransportHandler
@@ -9,25 +13,86 @@ logger = logging.getLogger(__name__)
 class ToolProxyRouter:
     """Routes tool execution requests to the appropriate transport handler."""
 
-    def __init__(self, transport_handlers: Dict[str, ITransportHandler]):
+    def __init__(self, transport_handlers: Dict[str, ITransportHandler], cache_ttl: float = 30.0):
         self.handlers = transport_handlers
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[Tuple, Tuple[float, list]] = {}
+        self._cache_lock = threading.Lock()
+        # Fetches currently running per cache key; concurrent misses wait on the same one
+        self._inflight: Dict[Tuple, Future] = {}
+        # Listing proxies to each server (HTTP call or subprocess), so fan-outs run concurrently
+        self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='tool-list')
+
+    @staticmethod
+    def _cache_key(server: ServerInfo) -> Tuple:
+        return (server.name, server.transport, server.port or tuple(server.command or ()))
 
     def list_tools(self, server: ServerInfo) -> list:
         """
         List tools by routing the request to the correct handler based on the server's transport.
+        Non-empty results are cached for cache_ttl seconds; empty lists (which is also what
+        handlers return on error) are always re-fetched. Concurrent misses for the same server
+        share a single fetch. Callers get deep copies since the UI routes enrich tool dicts in place.
         """
+        key = self._cache_key(server)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return copy.deepcopy(cached[1])
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                future = self._inflight[key] = Future()
+
+        if inflight is not None:
+            return copy.deepcopy(inflight.result())
+
+        try:
+            tools = self._fetch_tools(server)
+            stored = copy.deepcopy(tools)
+            with self._cache_lock:
+                if tools:
+                    self._cache[key] = (time.monotonic(), stored)
+                del self._inflight[key]
+            future.set_result(stored)
+        except BaseException as e:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        return tools
+
+    def list_tools_many(self, servers: List[ServerInfo]) -> List[list]:
+        """List the tools of several servers concurrently, returning the lists in server order."""
+        return list(self._pool.map(self.list_tools, servers))
+
+    def _fetch_tools(self, server: ServerInfo) -> list:
         handler = self.handlers.get(server.transport)
         if not handler:
             message = f"Unsupported transport '{server.transport}' for proxying."
             logger.error(message)
             return []
-        
         return handler.proxy_list_tools(server)
 
+    def invalidate(self, server_name: Optional[str] = None) -> None:
+        """Drop cached tool lists for one server, or for all servers if no name is given."""
+        with self._cache_lock:
+            if server_name is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == server_name]:
+                    del self._cache[key]
+
     def get_tool(self, server: ServerInfo, tool_name: str) -> dict:
         """
         Get a single tool's details by listing all tools and finding the one with the matching name.
+        On a warm cache only the matching tool is copied.
         """
+        with self._cache_lock:
+            cached = self._cache.get(self._cache_key(server))
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            tool = next((tool for tool in cached[1] if tool.get('name') == tool_name), None)
+            return copy.deepcopy(tool)
+
         all_tools = self.list_tools(server)
         return next((tool for tool in all_tools if tool.get('name') == tool_name), None)
 
@@ -1,85 +1,327 @@
-import json
+import atexit
 import logging
+import os
 import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
 
 from app.core.models import ServerInfo
+from app.core.serialization import dumps, loads
 from app.proxy.base import ITransportHandler
 
 logger = logging.getLogger(__name__)
 
+class StdioSessionError(Exception):
+    """Raised when a stdio MCP server process dies, misbehaves or times out."""
+
+class _StdioSession:
+    """
+    A long-lived, initialized MCP server subprocess. Writes are serialized with a lock;
+    a reader thread routes each response to the waiting request by JSON-RPC id, so
+    requests to the same server can be in flight concurrently.
+    """
+
+    def __init__(self, cmd: Tuple[str, ...], cwd: Path, timeout: float, capture_stderr: bool = False):
+        self.cmd = cmd
+        # Guards stdin writes and request id allocation only
+        self.lock = threading.Lock()
+        self._next_id = 0
+        # Frames queued to go out together with the next request's write
+        self._pending = b""
+        self._waiters: Dict[int, Future] = {}
+        self._waiters_lock = threading.Lock()
+        self._closed_error: Optional[StdioSessionError] = None
+        self.capture_stderr = capture_stderr
+        self._stderr_tail: deque = deque(maxlen=256)
+        self._stderr_thread: Optional[threading.Thread] = None
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE if capture_stderr else subprocess.DEVNULL,
+            bufsize=0,
+            cwd=cwd
+        )
+        if capture_stderr:
+            # Drain stderr continuously so a chatty server can't block on a full pipe
+            self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+            self._stderr_thread.start()
+        self._reader_thread = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader_thread.start()
+        try:
+            self._initialize(timeout)
+        except StdioSessionError as e:
+            self.close()
+            raise self.with_details(e) from e
+        except Exception:
+            self.close()
+            raise
+
+    def _drain_stderr(self) -> None:
+        for line in iter(self.process.stderr.readline, b""):
+            self._stderr_tail.append(line.decode(errors="replace"))
+
+    @property
+    def stderr(self) -> str:
+        return "".join(self._stderr_tail)
+
+    def with_details(self, error: Exception) -> StdioSessionError:
+        """Return a StdioSessionError for error that carries the captured stderr, if any."""
+        details = self.stderr if self.capture_stderr else "see process logs"
+        return StdioSessionError(f"{error}: {details}")
+
+    def alive(self) -> bool:
+        return self._closed_error is None and self.process.poll() is None
+
+    def _initialize(self, timeout: float) -> None:
+        response = self._call("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-proxy", "version": "1.0.0"}
+        }, timeout)
+        if "error" in response:
+            raise StdioSessionError(f"initialize failed: {response['error']}")
+        # Sent along with the first real request, saving a write per session start
+        with self.lock:
+            self._pending = dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}) + b"\n"
+
+    def request(self, method: str, params: dict, timeout: float) -> dict:
+        """Send one request and wait for its response."""
+        return self._call(method, params, timeout)
+
+    def _call(self, method: str, params: dict, timeout: float) -> dict:
+        future: Future = Future()
+        with self.lock:
+            self._next_id += 1
+            request_id = self._next_id
+            with self._waiters_lock:
+                if self._closed_error is not None:
+                    raise self._closed_error
+                self._waiters[request_id] = future
+            try:
+                self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            except StdioSessionError:
+                with self._waiters_lock:
+                    self._waiters.pop(request_id, None)
+                raise
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Only this request is abandoned; a late response for its id is dropped by the reader
+            with self._waiters_lock:
+                self._waiters.pop(request_id, None)
+            raise TimeoutError("timed out waiting for a response") from None
+
+    def _send(self, message: dict) -> None:
+        data = memoryview(b"".join((self._pending, dumps(message), b"\n")))
+        self._pending = b""
+        try:
+            fd = self.process.stdin.fileno()
+            while data:
+                data = data[os.write(fd, data):]
+        except (BrokenPipeError, OSError, ValueError) as e:
+            raise StdioSessionError(f"server process is not accepting input: {e}") from e
+
+    def _read_responses(self) -> None:
+        """Reader thread: hand each response line to the request waiting on its id."""
+        error = StdioSessionError("server process closed its output")
+        try:
+            for line in self._lines():
+                # Notifications and log output carry no id; skip them without a full parse
+                if b'"id"' not in line:
+                    continue
+                try:
+                    # Parse the raw bytes directly; no decode or copy of the line
+                    response = loads(line)
+                except ValueError:
+                    logger.warning("Failed to decode JSON response line: %r", line)
+                    continue
+                if not isinstance(response, dict):
+                    continue
+                with self._waiters_lock:
+                    future = self._waiters.pop(response.get("id"), None)
+                # Responses for timed-out or unknown ids have no waiter and are dropped
+                if future is not None:
+                    future.set_result(response)
+        except Exception as e:
+            error = StdioSessionError(f"failed reading server output: {e}")
+        with self._waiters_lock:
+            self._closed_error = error
+            waiters = list(self._waiters.values())
+            self._waiters.clear()
+        for future in waiters:
+            future.set_exception(error)
+
+    def _lines(self) -> Iterator[bytes]:
+        # Append into a bytearray and only scan the newly read bytes, so a large
+        # response arriving in many chunks isn't copied and rescanned each time
+        buffer = bytearray()
+        fd = self.process.stdout.fileno()
+        scanned = 0
+        while True:
+            end = buffer.find(b"\n", scanned)
+            if end < 0:
+                scanned = len(buffer)
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    return
+                buffer += chunk
+                continue
+            line = bytes(buffer[:end])
+            del buffer[:end + 1]
+            scanned = 0
+            yield line
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        # The reader sees EOF once the process is gone and fails any remaining waiters
+        self._reader_thread.join(timeout=1)
+        if self._stderr_thread is not None:
+            # Let the drain thread pick up the last lines written before exit
+            self._stderr_thread.join(timeout=1)
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
 class StdioTransportHandler(ITransportHandler):
-    """Handles tool execution proxying over stdio."""
+    """
+    Handles tool execution proxying over stdio.
+    Each server command gets one persistent, initialized subprocess that is reused across
+    requests and restarted lazily if it exits.
+    """
 
-    def __init__(self, workspace_root: Path):
+    def __init__(self, workspace_root: Path, timeout: float = 30, command_ttl: float = 10,
+                 capture_stderr: bool = False):
         self.workspace_root = workspace_root
+        self.timeout = timeout
+        # Keep the last lines of each server's stderr for error messages (diagnostics only)
+        self.capture_stderr = capture_stderr
+        # Resolved commands per server, re-validated against the filesystem after command_ttl seconds
+        self.command_ttl = command_ttl
+        self._cmd_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[float, Tuple[str, ...]]] = {}
+        self._sessions: Dict[Tuple[str, ...], _StdioSession] = {}
+        self._sessions_lock = threading.Lock()
+        self._start_locks: Dict[Tuple[str, ...], threading.Lock] = {}
+        atexit.register(self.close_all)
 
     def proxy_list_tools(self, server: ServerInfo) -> list:
         """Proxy a tools/list request to a stdio-based MCP server."""
         try:
-            cmd = self._build_command(server)
-            
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=self.workspace_root
-            )
-            
-            requests_data = self._build_list_tools_mcp_request()
-            stdout, stderr = process.communicate(input=requests_data, timeout=30)
-            
-            if process.returncode != 0:
-                logger.error(f"Stdio server '{server.name}' failed on tools/list with code {process.returncode}: {stderr}")
-                return []
-            
-            return self._parse_list_tools_mcp_response(stdout)
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"Stdio server '{server.name}' timed out during tools/list.")
+            response = self._request(server, "tools/list", {})
+        except TimeoutError:
+            logger.error("Stdio server '%s' timed out during tools/list.", server.name)
+            return []
+        except StdioSessionError as e:
+            logger.error("Stdio server '%s' failed on tools/list: %s", server.name, e)
             return []
         except Exception as e:
-            logger.error(f"Unexpected error in stdio proxy for {server.name} during tools/list: {e}")
+            logger.error("Unexpected error in stdio proxy for %s during tools/list: %s", server.name, e)
             return []
 
+        if 'error' in response:
+            logger.error("MCP server returned an error for tools/list: %s", response['error'])
+            return []
+        # The actual list of tools is nested inside the 'tools' key.
+        return response.get('result', {}).get('tools', [])
+
     def proxy_request(self, server: ServerInfo, tool_name: str, arguments: dict) -> dict:
         """Proxy request to a stdio-based MCP server."""
         try:
-            cmd = self._build_command(server)
-            
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=self.workspace_root
-            )
-            
-            requests_data = self._build_mcp_requests(tool_name, arguments)
-            stdout, stderr = process.communicate(input=requests_data, timeout=30)
-            
-            if process.returncode != 0:
-                logger.error(f"Stdio server '{server.name}' failed with code {process.returncode}: {stderr}")
-                return {'status': 'error', 'message': f'MCP server failed: {stderr}'}
-            
-            return self._parse_mcp_response(stdout)
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"Stdio server '{server.name}' timed out.")
+            response = self._request(server, "tools/call", {"name": tool_name, "arguments": arguments})
+        except TimeoutError:
+            logger.error("Stdio server '%s' timed out.", server.name)
             return {'status': 'error', 'message': 'Tool execution timed out'}
+        except StdioSessionError as e:
+            logger.error("Stdio server '%s' failed: %s", server.name, e)
+            return {'status': 'error', 'message': f'MCP server failed: {e}'}
         except Exception as e:
-            logger.error(f"Unexpected error in stdio proxy for {server.name}: {e}")
+            logger.error("Unexpected error in stdio proxy for %s: %s", server.name, e)
             return {'status': 'error', 'message': f'An unexpected stdio proxy error occurred: {str(e)}'}
 
-    def _build_command(self, server: ServerInfo) -> list[str]:
-        """Build the execution command for the stdio server."""
+        if 'error' in response:
+            return {'status': 'error', 'message': response['error'].get('message', 'Tool execution failed')}
+        return {'status': 'success', 'result': response.get('result', {})}
+
+    def close_all(self) -> None:
+        """Terminate all server subprocesses."""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def _request(self, server: ServerInfo, method: str, params: dict) -> dict:
+        """Send a request over the server's session, discarding the session if it breaks."""
+        session = self._get_session(server)
+        try:
+            return session.request(method, params, self.timeout)
+        except StdioSessionError as e:
+            # The process is broken, so start fresh next time. A timeout only abandons
+            # that one request; other callers keep using the session.
+            self._discard(session)
+            raise session.with_details(e) from e
+
+    def _get_session(self, server: ServerInfo) -> _StdioSession:
+        # The resolved command tuple doubles as the session key
+        key = self._build_command(server)
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session and session.alive():
+                return session
+            start_lock = self._start_locks.setdefault(key, threading.Lock())
+
+        # Only one thread starts a given server; others wait and reuse its session
+        with start_lock:
+            with self._sessions_lock:
+                session = self._sessions.get(key)
+                if session and session.alive():
+                    return session
+                stale = self._sessions.pop(key, None)
+            if stale:
+                stale.close()
+            logger.info("Starting stdio server '%s'", server.name)
+            session = _StdioSession(key, self.workspace_root, self.timeout, self.capture_stderr)
+            with self._sessions_lock:
+                self._sessions[key] = session
+            return session
+
+    def _discard(self, session: _StdioSession) -> None:
+        with self._sessions_lock:
+            if self._sessions.get(session.cmd) is session:
+                del self._sessions[session.cmd]
+        session.close()
+
+    def _build_command(self, server: ServerInfo) -> Tuple[str, ...]:
+        """Build the execution command for the stdio server, reusing a recent resolution."""
         if not server.command:
             raise ValueError(f"No command specified for stdio server '{server.name}'")
-        
+
+        # Keyed on the configured command too, so a changed server config resolves afresh
+        key = (server.name, tuple(server.command))
+        cached = self._cmd_cache.get(key)
+        now = time.monotonic()
+        if cached and now - cached[0] < self.command_ttl:
+            return cached[1]
+
+        # Stored immutable so it can be shared by every caller without copying
+        cmd = tuple(self._resolve_command(server))
+        self._cmd_cache[key] = (now, cmd)
+        return cmd
+
+    def _resolve_command(self, server: ServerInfo) -> list[str]:
+        """Resolve the server's command, making a relative script path absolute."""
         cmd = server.command.copy()
         # Resolve relative script path to be absolute
         if len(cmd) > 1 and not Path(cmd[1]).is_absolute():
@@ -87,79 +329,5 @@ class StdioTransportHandler(ITransportHandler):
             if not script_path.exists():
                 raise FileNotFoundError(f"Server script not found for '{server.name}' at {script_path}")
             cmd[1] = str(script_path.resolve())
-            
-        return cmd
-
-    def _build_list_tools_mcp_request(self) -> str:
-        """Build the sequence of JSON-RPC messages for a tools/list request."""
-        init_request = {
-            "jsonrpc": "2.0", "id": 1, "method": "initialize",
-            "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "mcp-proxy"}}
-        }
-        initialized_notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
-        list_tools_request = {
-            "jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}
-        }
-        
-        return (
-            json.dumps(init_request) + "\n" +
-            json.dumps(initialized_notification) + "\n" +
-            json.dumps(list_tools_request) + "\n"
-        )
 
-    def _build_mcp_requests(self, tool_name: str, arguments: dict) -> str:
-        """Build the sequence of JSON-RPC messages for the stdio server."""
-        init_request = {
-            "jsonrpc": "2.0", "id": 1, "method": "initialize",
-            "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "mcp-proxy"}}
-        }
-        initialized_notification = {"jsonrpc": "2.0", "method": "notifications/initialized"}
-        tool_request = {
-            "jsonrpc": "2.0", "id": 2, "method": "tools/call",
-            "params": {"name": tool_name, "arguments": arguments}
-        }
-        
-        return (
-            json.dumps(init_request) + "\n" +
-            json.dumps(initialized_notification) + "\n" +
-            json.dumps(tool_request) + "\n"
-        )
-
-    def _parse_list_tools_mcp_response(self, stdout: str) -> list:
-        """Parse the stdout from the MCP server to find the tools/list response."""
-        for line in stdout.strip().split('\n'):
-            if not line.strip():
-                continue
-            try:
-                response = json.loads(line)
-                if response.get('id') == 2:  # Corresponds to the list_tools_request id
-                    if 'error' in response:
-                        logger.error(f"MCP server returned an error for tools/list: {response['error']}")
-                        return []
-                    
-                    result = response.get('result', {})
-                    # The actual list of tools is nested inside the 'tools' key.
-                    return result.get('tools', [])
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to decode JSON response line: {line}")
-                continue
-        
-        logger.error('No valid tools/list response received from MCP server')
-        return []
-
-    def _parse_mcp_response(self, stdout: str) -> dict:
-        """Parse the stdout from the MCP server to find the tool call response."""
-        for line in stdout.strip().split('\n'):
-            if not line.strip():
-                continue
-            try:
-                response = json.loads(line)
-                if response.get('id') == 2:  # Corresponds to the tool_request id
-                    if 'error' in response:
-                        return {'status': 'error', 'message': response['error'].get('message', 'Tool execution failed')}
-                    return {'status': 'success', 'result': response.get('result', {})}
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to decode JSON response line: {line}")
-                continue
-        
-        return {'status': 'error', 'message': 'No valid tool response received from MCP server'} 
\ No newline at end of file
+        return cmd
@@ -6,31 +6,41 @@ import logging
 ui_bp = Blueprint('ui', __name__)
 logger = logging.getLogger(__name__)
 
+def _discover_once():
+    """Return the registry entries, discovering them at most once per request."""
+    if '_discover_cache' not in g:
+        g._discover_cache = g.server_discovery.discover()
+    return g._discover_cache
+
+def _list_tools_for(entries):
+    """Fetch the tool list of every registry entry concurrently, in entry order."""
+    return g.tool_proxy_router.list_tools_many(entries)
+
+def _unpack(tool):
+    """Return the tool with its custom 'data' fields merged over the top level."""
+    data = tool.get('data')
+    return {**tool, **data} if data else tool
+
+def _enrich(tool, server_name_cleaned):
+    """Return an unpacked copy of the tool with its dashboard context added."""
+    return {**_unpack(tool),
+            'server_name': server_name_cleaned,
+            'directory': f"{server_name_cleaned}/{tool['name']}"}
+
 @ui_bp.route('/')
 def index():
     """Main dashboard showing platform overview."""
-    registry_entries = g.server_discovery.discover()
+    registry_entries = _discover_once()
     servers = g.virtual_server_manager.list_virtual_servers()
     
     # Extract all tools from all registry entries for the dashboard
     all_tools = []
-    for entry in registry_entries:
-        # Get full tool details via proxy
-        tools_details = g.tool_proxy_router.list_tools(entry)
-        for tool in tools_details:
-            # Add registry entry context to each tool
-            tool_with_context = tool.copy()
-            
-            # Unpack custom data FIRST
-            if 'data' in tool and tool['data']:
-                tool_with_context.update(tool['data'])
-
-            # Set the correct directory path LAST, overwriting any incorrect path
-            server_name_cleaned = entry.name.split('/')[-1]
-            tool_with_context['server_name'] = server_name_cleaned
-            tool_with_context['directory'] = f"{server_name_cleaned}/{tool['name']}"
-            
-            all_tools.append(tool_with_context)
+    # Get full tool details via proxy
+    for entry, tools_details in zip(registry_entries, _list_tools_for(registry_entries)):
+        # Add registry entry context to each tool; the directory path is set last
+        # so it overrides any incorrect path in the custom data
+        server_name_cleaned = entry.name.rpartition('/')[2]
+        all_tools.extend([_enrich(tool, server_name_cleaned) for tool in tools_details])
     
     # Calculate statistics
     total_tools = len(all_tools)
@@ -49,9 +59,8 @@ def index():
 @ui_bp.route('/tools/<path:tool_directory>')
 def tool_details(tool_directory):
     """Show detailed information about a specific tool."""
-    if '/' in tool_directory:
-        server_name, tool_name = tool_directory.split('/', 1)
-    else:
+    server_name, sep, tool_name = tool_directory.partition('/')
+    if not sep:
         return "Invalid tool directory format", 400
     
     target_server = g.virtual_server_manager.get_server(server_name, g.server_discovery)
@@ -59,11 +68,8 @@ def tool_details(tool_directory):
     if not target_server:
         return f"Server not found: {server_name}", 404
         
-    # Get all tools from the server via proxy
-    all_tools_details = g.tool_proxy_router.list_tools(target_server)
-    
-    # Find the specific tool we need
-    enhanced_tool = next((t for t in all_tools_details if t['name'] == tool_name), None)
+    # Get the specific tool we need from the server via proxy
+    enhanced_tool = g.tool_proxy_router.get_tool(target_server, tool_name)
 
     if not enhanced_tool:
         return f"Tool not found: {tool_directory}", 404
@@ -76,8 +82,6 @@ def tool_details(tool_directory):
     if 'data' in enhanced_tool and enhanced_tool['data']:
         enhanced_tool.update(enhanced_tool['data'])
 
-    logger.info(f"DEBUG: Data for tool '{tool_name}': {enhanced_tool}")
-
     return render_template('tool_details.html', 
                          tool=enhanced_tool, 
                          tool_directory=tool_directory,
@@ -86,7 +90,7 @@ def tool_details(tool_directory):
 @ui_bp.route('/registry')
 def registry_dashboard():
     """Dashboard showing all discovered registry entries."""
-    registry_entries = g.server_discovery.discover()
+    registry_entries = _discover_once()
     servers = g.virtual_server_manager.list_virtual_servers()
     
     return render_template('registry.html', 
@@ -119,34 +123,22 @@ def servers_list():
 @ui_bp.route('/servers/create')
 def create_server():
     """Render the page to create a new virtual server."""
-    registry_entries = g.server_discovery.discover()
+    registry_entries = _discover_once()
     prompts = g.prompt_manager.get_all_prompts()
 
     # Enhance with full tool details and unpack data
-    for entry in registry_entries:
-        full_tools = g.tool_proxy_router.list_tools(entry)
-        unpacked_tools = []
-        for tool in full_tools:
-            if 'data' in tool and tool['data']:
-                tool.update(tool['data'])
-            unpacked_tools.append(tool)
-        entry.tools = unpacked_tools
+    for entry, full_tools in zip(registry_entries, _list_tools_for(registry_entries)):
+        entry.tools = [_unpack(tool) for tool in full_tools]
     return render_template('create_server.html', servers=registry_entries, prompts=prompts)
 
 @ui_bp.route('/servers/create/<server_name>')
 def create_server_with_preselection(server_name):
     """Render the create page with a pre-selected server."""
-    registry_entries = g.server_discovery.discover()
+    registry_entries = _discover_once()
     prompts = g.prompt_manager.get_all_prompts()
     # Enhance with full tool details and unpack data
-    for entry in registry_entries:
-        full_tools = g.tool_proxy_router.list_tools(entry)
-        unpacked_tools = []
-        for tool in full_tools:
-            if 'data' in tool and tool['data']:
-                tool.update(tool['data'])
-            unpacked_tools.append(tool)
-        entry.tools = unpacked_tools
+    for entry, full_tools in zip(registry_entries, _list_tools_for(registry_entries)):
+        entry.tools = [_unpack(tool) for tool in full_tools]
     return render_template('create_server.html', servers=registry_entries, prompts=prompts, preselected_server=server_name)
 
 @ui_bp.route('/servers/<server_name>')
@@ -157,10 +149,12 @@ def server_details(server_name):
         return f"Server not found: {server_name}", 404
 
     # To enrich the tool details, we first need a map of all possible source servers.
-    all_source_servers = g.server_discovery.discover()
+    all_source_servers = _discover_once()
     source_server_map = {s.name: s for s in all_source_servers}
 
-    enriched_tools = []
+    # Resolve the referenced source servers first so each one's tools are listed only once
+    refs = []
+    used_servers = {}
     for tool_ref in server.selected_tools:
         source_server_name = tool_ref.get('server_name')
         tool_name = tool_ref.get('tool_name')
@@ -169,9 +163,18 @@ def server_details(server_name):
         # Ensure we have a valid source server for the tool
         if not source_server or not tool_name:
             continue
-            
-        # Fetch the full, live details for the tool via the proxy
-        full_tool_details = g.tool_proxy_router.get_tool(source_server, tool_name)
+        refs.append((source_server_name, tool_name))
+        used_servers[source_server_name] = source_server
+
+    # Fetch the full, live tool details for each source server via the proxy
+    tools_by_server = {
+        name: {t['name']: t for t in tools}
+        for name, tools in zip(used_servers, _list_tools_for(list(used_servers.values())))
+    }
+
+    enriched_tools = []
+    for source_server_name, tool_name in refs:
+        full_tool_details = tools_by_server[source_server_name].get(tool_name)
         if full_tool_details:
             # The template expects a 'config' key containing the tool's details
             enriched_tools.append({
@@ -193,12 +196,12 @@ def edit_server(server_name):
     if not server:
         return f"Server not found: {server_name}", 404
     
-    registry_entries = g.server_discovery.discover()
+    registry_entries = _discover_once()
     prompts = g.prompt_manager.get_all_prompts()
 
     # Load full tool details for all available tools using the proxy
-    for entry in registry_entries:
-        entry.tools = g.tool_proxy_router.list_tools(entry)
+    for entry, tools in zip(registry_entries, _list_tools_for(registry_entries)):
+        entry.tools = tools
 
     return render_template('edit_server.html',
                          server=server,
@@ -23,6 +23,7 @@ def create_prompt():
                 category=request.form.get('category'),
                 prompt_template=request.form.get('prompt_template')
             )
+            g.virtual_server_manager.invalidate_custom_prompts()
             flash(f"Prompt '{prompt.name}' created successfully!", 'success')
             return redirect(url_for('prompts.list_prompts'))
         except ValueError as e:
@@ -48,6 +49,7 @@ def edit_prompt(prompt_id):
                 "prompt_template": request.form.get('prompt_template')
             }
             g.prompt_manager.update_prompt(prompt_id, updates)
+            g.virtual_server_manager.invalidate_custom_prompts()
             flash(f"Prompt '{updates['name']}' updated successfully!", 'success')
             return redirect(url_for('prompts.list_prompts'))
         except ValueError as e:
@@ -67,6 +69,7 @@ def delete_prompt(prompt_id):
         flash(f"Prompt with ID '{prompt_id}' not found.", 'danger')
     else:
         g.prompt_manager.delete_prompt(prompt_id)
+        g.virtual_server_manager.invalidate_custom_prompts()
         flash(f"Prompt '{prompt.name}' has been deleted.", 'success')
 
     return redirect(url_for('prompts.list_prompts')) 
\ No newline at end of file
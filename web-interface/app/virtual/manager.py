@@ -1,53 +1,121 @@
 #!/usr/bin/env python3
 """
 Manages the lifecycle of virtual servers.
+
+This module only reads and writes configuration. Calls to MCP servers belong in app.proxy,
+whose transport handlers hold the pooled HTTP session and persistent stdio sessions.
 """
 import os
+import re
 import sys
+import copy
+import functools
+import threading
+import time
 import yaml
-import json
-import asyncio
-import subprocess
+from collections import OrderedDict
 import socket
-import concurrent.futures
-import requests
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+from dataclasses import fields
 from datetime import datetime
 import logging
-from abc import ABC, abstractmethod
 
 from app.core.models import IServer, ServerInfo, VirtualServer
+from app.core.yaml_io import NoAliasDumper, ParsedFileCache, read_file
 from app.discovery.base import IServerDiscoverer
-
-
-# Add mcp-proxy-server to path to import ToolExecutor
-sys.path.append(str(Path(__file__).parent.parent.parent / "mcp-proxy-server"))
+from app.prompts.manager import PromptManager
 
 try:
-    from tool_executor import ToolExecutor
-    REAL_TOOL_EXECUTION = True
-except ImportError as e:
-    print(f"Warning: Could not import real tool executor: {e}")
-    REAL_TOOL_EXECUTION = False
-
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 logger = logging.getLogger(__name__)
 
+_TOOL_EXECUTOR_DIR = Path(__file__).parent.parent.parent / "mcp-proxy-server"
+
+def _load_tool_executor_class():
+    """Import ToolExecutor from mcp-proxy-server, or return None if it isn't available."""
+    # Add mcp-proxy-server to path to import ToolExecutor
+    if str(_TOOL_EXECUTOR_DIR) not in sys.path:
+        sys.path.append(str(_TOOL_EXECUTOR_DIR))
+    try:
+        from tool_executor import ToolExecutor
+        return ToolExecutor
+    except ImportError as e:
+        logger.warning(f"Could not import real tool executor: {e}")
+        return None
+
+# Placeholders of custom prompts ({{name}}) and registry tool prompt templates ({name})
+_DOUBLE_BRACE_RE = re.compile(r'\{\{([^{}]+)\}\}')
+_SINGLE_BRACE_RE = re.compile(r'\{([^{}]+)\}')
+
+_PROC_NET_TCP = ("/proc/net/tcp", "/proc/net/tcp6")
+
+def _tcp_ports_in_use() -> Optional[set]:
+    """
+    Return the local ports of all TCP sockets (any state) from /proc/net, or None where
+    /proc/net isn't available.
+    """
+    used = set()
+    found = False
+    for path in _PROC_NET_TCP:
+        try:
+            f = open(path, 'r')
+        except OSError:
+            continue
+        found = True
+        with f:
+            next(f, None)  # header
+            for line in f:
+                # "  sl  local_address ..." where local_address is "HEXADDR:HEXPORT"
+                local_address = line.split(None, 2)[1]
+                used.add(int(local_address.rpartition(':')[2], 16))
+    return used if found else None
+
 class VirtualServerManager:
     """Manages the lifecycle of virtual servers."""
     
-    def __init__(self, workspace_root: Path):
+    def __init__(self, workspace_root: Path, discover_ttl: float = 2.0, index_ttl: float = 2.0,
+                 prompt_manager: Optional[PromptManager] = None):
         self.workspace_root = workspace_root
+        self.prompt_manager = prompt_manager
         self.virtual_servers_path = workspace_root / "servers-configs"
         self.virtual_servers_path.mkdir(exist_ok=True)
-        self.tool_executor = ToolExecutor(workspace_root) if REAL_TOOL_EXECUTION else None
+        self._tool_executor = None
+        self._tool_executor_loaded = False
+        # Parsed virtual server configs, reparsed once their (mtime_ns, size) changes
+        self._vs_cache = ParsedFileCache()
+        # Virtual server name -> config file from one directory scan, reused for index_ttl seconds
+        # and dropped whenever this manager adds or removes a file
+        self.index_ttl = index_ttl
+        self._vs_index: Optional[Tuple[float, Dict[str, Path]]] = None
+        # Registry entries by name, reused for discover_ttl seconds across the capability/prompt lookups
+        self.discover_ttl = discover_ttl
+        self._discover_cache: Optional[Tuple[float, IServerDiscoverer, Dict[str, ServerInfo]]] = None
+        # Parsed tool/resource configs of registry servers, LRU-bounded and keyed like _vs_cache
+        self._config_cache: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+        self._config_cache_lock = threading.Lock()
+        self._config_cache_size = 512
+        # Prompt name -> prompt config per registry server, valid while its parsed configs are the same objects
+        self._prompt_index_cache: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], Dict[str, Dict[str, Any]]]] = {}
+        # Custom prompts per virtual server; cleared by invalidate_custom_prompts() on every write path
+        self._custom_prompts = functools.lru_cache(maxsize=512)(self._load_custom_prompts)
+
+    @property
+    def tool_executor(self):
+        """The real ToolExecutor, imported on first use; None when mcp-proxy-server isn't present."""
+        if not self._tool_executor_loaded:
+            executor_class = _load_tool_executor_class()
+            self._tool_executor = executor_class(self.workspace_root) if executor_class else None
+            self._tool_executor_loaded = True
+        return self._tool_executor
 
     def create_virtual_server(self, name: str, description: str, selected_tools: List[Dict], selected_prompts: List[str], enabled: bool = True, api_key: str = None) -> VirtualServer:
         """Create and save a new virtual server."""
-        # Check for name collisions
+        # Check for name collisions against the directory as it is now, not a recent scan
+        self._vs_index = None
         if self.get_virtual_server(name):
             raise ValueError(f"A virtual server with the name '{name}' already exists.")
 
@@ -70,43 +138,113 @@ class VirtualServerManager:
     def list_virtual_servers(self) -> List[VirtualServer]:
         """Load all virtual servers from the configuration directory."""
         virtual_servers = []
+        seen = set()
+        index: Dict[str, Path] = {}
+        now = time.monotonic()
         
-        for config_file in self.virtual_servers_path.glob("*.yaml"):
-            try:
-                with open(config_file, 'r') as f:
-                    config = yaml.safe_load(f)
-                
-                virtual_server = VirtualServer(**config)
-                virtual_servers.append(virtual_server)
-            except Exception as e:
-                logger.warning(f"Error loading virtual server {config_file}: {e}")
+        with os.scandir(self.virtual_servers_path) as it:
+            for entry in it:
+                if not entry.name.endswith(".yaml") or not entry.is_file():
+                    continue
+                config_file = Path(entry.path)
+                seen.add(config_file)
+                index[entry.name[:-5]] = config_file
+                try:
+                    virtual_server = VirtualServer(**self._load_config(config_file, entry.stat()))
+                    virtual_servers.append(virtual_server)
+                except Exception as e:
+                    logger.warning(f"Error loading virtual server {config_file}: {e}")
+        
+        # Forget files that have been removed behind our back
+        for stale in self._vs_cache.paths():
+            if stale not in seen:
+                self._vs_cache.discard(stale)
+        # The scan doubles as a fresh name index
+        self._vs_index = (now, index)
         
         return sorted(virtual_servers, key=lambda vs: vs.name)
     
     def get_virtual_server(self, name: str) -> Optional[VirtualServer]:
         """Load a single virtual server by name."""
-        config_file = self.virtual_servers_path / f"{name}.yaml"
+        config_file = self._vs_index_lookup(name)
+        if config_file is None:
+            return None
         
-        if not config_file.exists():
+        try:
+            st = config_file.stat()
+        except OSError:
             return None
         
         try:
-            with open(config_file, 'r') as f:
-                config = yaml.safe_load(f)
-            
-            return VirtualServer(**config)
+            return VirtualServer(**self._load_config(config_file, st))
         except Exception as e:
             logger.warning(f"Error loading virtual server {name}: {e}")
             return None
     
+    def _vs_index_lookup(self, name: str) -> Optional[Path]:
+        """Return the config file of the named virtual server, rescanning the directory once the index expires."""
+        cached = self._vs_index
+        now = time.monotonic()
+        if cached is None or now - cached[0] >= self.index_ttl:
+            index: Dict[str, Path] = {}
+            with os.scandir(self.virtual_servers_path) as it:
+                for entry in it:
+                    if entry.name.endswith(".yaml") and entry.is_file():
+                        index[entry.name[:-5]] = Path(entry.path)
+            cached = self._vs_index = (now, index)
+        return cached[1].get(name)
+    
+    def _load_config(self, config_file: Path, st: os.stat_result) -> Dict[str, Any]:
+        """
+        Return the parsed config of a virtual server file, parsing it only if it changed.
+        Callers get a private copy, since VirtualServer instances are modified before saving.
+        """
+        try:
+            return self._vs_cache.get(config_file, st)
+        except KeyError:
+            pass
+        
+        self._vs_cache.put(config_file, st, yaml.load(read_file(config_file, st.st_size), Loader=_YamlLoader))
+        return self._vs_cache.get(config_file, st)
+    
     def get_server(self, name: str, discoverer: IServerDiscoverer) -> Optional[IServer]:
         """Gets any server (virtual or real) by its name."""
         server = self.get_virtual_server(name)
         if server:
             return server
         
-        registry_entries = discoverer.discover()
-        return next((entry for entry in registry_entries if entry.name == name), None)
+        entry = self._entries_by_name(discoverer).get(name)
+        # Callers attach per-request data to the entry, so don't hand out the cached one
+        return copy.copy(entry) if entry else None
+
+    def _entries_by_name(self, discoverer: IServerDiscoverer) -> Dict[str, ServerInfo]:
+        """
+        Index the discovered registry entries by name, keeping the first entry per name.
+        The index is reused for discover_ttl seconds; treat its entries as read-only.
+        """
+        cached = self._discover_cache
+        now = time.monotonic()
+        if cached and cached[1] is discoverer and now - cached[0] < self.discover_ttl:
+            return cached[2]
+        
+        entries_by_name: Dict[str, ServerInfo] = {}
+        for entry in discoverer.discover():
+            entries_by_name.setdefault(entry.name, entry)
+        self._discover_cache = (now, discoverer, entries_by_name)
+        return entries_by_name
+
+    def invalidate_discovery(self) -> None:
+        """Drop the cached registry index so the next lookup rediscovers."""
+        self._discover_cache = None
+
+    @staticmethod
+    def _source_server_names(server: VirtualServer) -> List[str]:
+        """Return the distinct source server names of a virtual server's tools, in order."""
+        # Dedupe first, then drop the missing/empty names once rather than testing every tool
+        names = dict.fromkeys(t.get('server_name') for t in server.selected_tools or ())
+        names.pop(None, None)
+        names.pop('', None)
+        return list(names)
 
     def update_virtual_server(self, virtual_server: VirtualServer, updates: Dict[str, Any]) -> None:
         """
@@ -132,21 +270,53 @@ class VirtualServerManager:
     def delete_virtual_server(self, name: str) -> bool:
         """Delete a virtual server by name."""
         config_file = self.virtual_servers_path / f"{name}.yaml"
+        self._vs_cache.discard(config_file)
+        self.invalidate_custom_prompts()
         
         if config_file.exists():
             config_file.unlink()
+            self._vs_index = None
             return True
         
         return False
 
     def _save_virtual_server(self, virtual_server: VirtualServer) -> None:
-        """Save a virtual server's configuration to a YAML file."""
+        """
+        Save a virtual server's configuration to a YAML file. The file is replaced atomically,
+        and left untouched (mtime included) when its content wouldn't change.
+        """
         config_file = self.virtual_servers_path / f"{virtual_server.name}.yaml"
         
-        with open(config_file, 'w') as f:
-            # Convert dataclass to dict, but handle nested dataclasses if any
-            data = asdict(virtual_server)
-            yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+        # Shallow field dict: VirtualServer has no nested dataclasses, so asdict()'s deep copy isn't needed
+        data = {f.name: getattr(virtual_server, f.name) for f in fields(virtual_server)}
+        content = yaml.dump(data, Dumper=NoAliasDumper, default_flow_style=False, sort_keys=False).encode()
+        
+        try:
+            unchanged = config_file.read_bytes() == content
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            # Same-size rewrites within the filesystem's mtime granularity would look unchanged
+            self._vs_cache.discard(config_file)
+            # Write to a temp file and rename over the target so readers never see a partial file
+            tmp_path = config_file.with_suffix('.yaml.tmp')
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, config_file)
+                index = self._vs_index
+                if index is not None and virtual_server.name not in index[1]:
+                    self._vs_index = None
+            except OSError:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        
+        self.invalidate_custom_prompts()
         
         # Ensure custom prompts directory exists
         prompts_dir = self.virtual_servers_path / "prompts"
@@ -156,11 +326,18 @@ class VirtualServerManager:
         """
         Get a list of available network ports.
         """
+        candidates = range(start_port, start_port + count * 10)
+        used = _tcp_ports_in_use()
+        if used is not None:
+            return [port for port in candidates if port not in used][:count]
         
+        # No /proc/net (non-Linux): probe each port by binding to it
         available_ports = []
-        for port in range(start_port, start_port + count * 10):
+        for port in candidates:
             try:
                 with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                    # Ports lingering in TIME_WAIT are usable by servers, which set SO_REUSEADDR too
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                     s.bind(('localhost', port))
                     available_ports.append(port)
                     if len(available_ports) >= count:
@@ -208,16 +385,12 @@ class VirtualServerManager:
     def _get_prompts_for_virtual_server(self, server: VirtualServer, discoverer: IServerDiscoverer) -> List[Dict[str, Any]]:
         """Gathers prompts for a virtual server from its constituent parts."""
         prompts = []
-        registry_entries = discoverer.discover()
-        processed_entries = set()
+        entries_by_name = self._entries_by_name(discoverer)
         
-        for tool_config in server.selected_tools:
-            source_server_name = tool_config.get('server_name')
-            if source_server_name and source_server_name not in processed_entries:
-                source_entry = next((entry for entry in registry_entries if entry.name == source_server_name), None)
-                if source_entry:
-                    prompts.extend(self._extract_prompts_from_actual_server(source_entry))
-                    processed_entries.add(source_server_name)
+        for source_server_name in self._source_server_names(server):
+            source_entry = entries_by_name.get(source_server_name)
+            if source_entry:
+                prompts.extend(self._extract_prompts_from_actual_server(source_entry))
         
         # Add custom prompts for virtual servers
         custom_prompts = self.get_custom_prompts(server.name)
@@ -240,35 +413,85 @@ class VirtualServerManager:
         """Extract prompts from an actual registry entry directory."""
         prompts = []
         try:
-            server_dir = self.workspace_root / server.path
-            tools_dir = server_dir / "tools"
-            
-            if tools_dir.exists():
-                for tool_dir in tools_dir.iterdir():
-                    if tool_dir.is_dir():
-                        config_path = tool_dir / "config.yaml"
-                        if config_path.exists():
-                            with open(config_path, 'r') as f:
-                                tool_config = yaml.safe_load(f)
-                            
-                            for prompt_config in tool_config.get('prompts', []):
-                                prompts.append({
-                                    'name': prompt_config['name'],
-                                    'description': prompt_config['description'],
-                                    'arguments': [
-                                        {
-                                            'name': arg['name'],
-                                            'description': arg['description'],
-                                            'required': arg.get('required', False)
-                                        }
-                                        for arg in prompt_config.get('arguments', [])
-                                    ]
-                                })
+            for tool_config in self._iter_tool_configs(server):
+                for prompt_config in tool_config.get('prompts', []):
+                    prompts.append({
+                        'name': prompt_config['name'],
+                        'description': prompt_config['description'],
+                        'arguments': [
+                            {
+                                'name': arg['name'],
+                                'description': arg['description'],
+                                'required': arg.get('required', False)
+                            }
+                            for arg in prompt_config.get('arguments', [])
+                        ]
+                    })
         except Exception as e:
             logger.error(f"Error extracting prompts from actual registry entry {server.name}: {e}")
         
         return prompts
 
+    def _iter_tool_configs(self, server: ServerInfo) -> Iterator[Dict[str, Any]]:
+        """Yield the parsed tools/<tool>/config.yaml of a registry server, in directory order."""
+        tools_dir = self.workspace_root / server.path / "tools"
+        try:
+            it = os.scandir(tools_dir)
+        except FileNotFoundError:
+            return
+        with it:
+            config_paths = [Path(entry.path) / "config.yaml" for entry in it if entry.is_dir()]
+        
+        for config_path in config_paths:
+            tool_config = self._load_registry_config(config_path)
+            if tool_config is not None:
+                yield tool_config
+
+    def _load_registry_config(self, config_path: Path, st: Optional[os.stat_result] = None) -> Any:
+        """
+        Return the parsed YAML of a registry server config file, or None if it doesn't exist.
+        Parses are cached while the file's (mtime_ns, size) is unchanged; treat results as read-only.
+        Pass st when the caller already has the file's stat, e.g. from a DirEntry.
+        """
+        if st is None:
+            try:
+                st = os.stat(config_path)
+            except FileNotFoundError:
+                return None
+        key = str(config_path)
+        with self._config_cache_lock:
+            cached = self._config_cache.get(key)
+            if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                self._config_cache.move_to_end(key)
+                return cached[2]
+        
+        config = yaml.load(read_file(config_path, st.st_size), Loader=_YamlLoader)
+        with self._config_cache_lock:
+            self._config_cache[key] = (st.st_mtime_ns, st.st_size, config)
+            self._config_cache.move_to_end(key)
+            while len(self._config_cache) > self._config_cache_size:
+                self._config_cache.popitem(last=False)
+        return config
+
+    def _prompt_index_for_server(self, server: ServerInfo) -> Dict[str, Dict[str, Any]]:
+        """
+        Map prompt names to their configs across a registry server's tools (first one wins).
+        Rebuilt only when one of the server's parsed tool configs was reloaded.
+        """
+        configs = tuple(self._iter_tool_configs(server))
+        key = (server.name, server.path)
+        cached = self._prompt_index_cache.get(key)
+        # The cache holds the configs it was built from, so identity comparison is safe
+        if cached and len(cached[0]) == len(configs) and all(a is b for a, b in zip(cached[0], configs)):
+            return cached[1]
+        
+        index: Dict[str, Dict[str, Any]] = {}
+        for tool_config in configs:
+            for prompt_config in tool_config.get('prompts', []):
+                index.setdefault(prompt_config['name'], prompt_config)
+        self._prompt_index_cache[key] = (configs, index)
+        return index
+
     def _extract_resources_from_server(self, server: ServerInfo):
         """Extract actual resources from server tool configs."""
         resources = []
@@ -277,9 +500,11 @@ class VirtualServerManager:
             resources_dir = server_dir / "resources" / "static"
             
             if resources_dir.exists():
-                for config_file in resources_dir.glob("*.yaml"):
-                    with open(config_file, 'r') as f:
-                        resource_config = yaml.safe_load(f)
+                with os.scandir(resources_dir) as it:
+                    config_files = [(entry.path, entry.stat()) for entry in it
+                                    if entry.name.endswith(".yaml") and not entry.name.startswith(".")]
+                for config_file, st in config_files:
+                    resource_config = self._load_registry_config(Path(config_file), st)
                     
                     resources.append({
                         'uri': resource_config['uri'],
@@ -296,29 +521,61 @@ class VirtualServerManager:
         """Extract actual resource templates from server tool configs."""
         templates = []
         try:
-            server_dir = self.workspace_root / server.path
-            tools_dir = server_dir / "tools"
-            
-            if tools_dir.exists():
-                for tool_dir in tools_dir.iterdir():
-                    if tool_dir.is_dir():
-                        config_path = tool_dir / "config.yaml"
-                        if config_path.exists():
-                            with open(config_path, 'r') as f:
-                                tool_config = yaml.safe_load(f)
-                            
-                            for template_config in tool_config.get('resource_templates', []):
-                                templates.append({
-                                    'uriTemplate': template_config['uriTemplate'],
-                                    'name': template_config['name'],
-                                    'description': template_config['description'],
-                                    'mimeType': template_config['mimeType']
-                                })
+            for tool_config in self._iter_tool_configs(server):
+                for template_config in tool_config.get('resource_templates', []):
+                    templates.append({
+                        'uriTemplate': template_config['uriTemplate'],
+                        'name': template_config['name'],
+                        'description': template_config['description'],
+                        'mimeType': template_config['mimeType']
+                    })
         except Exception as e:
             logger.error(f"Error extracting resource templates from {server.name}: {e}")
         
         return templates
 
+    def invalidate_custom_prompts(self) -> None:
+        """Drop cached custom prompts; call after a virtual server or custom prompt is written."""
+        self._custom_prompts.cache_clear()
+
+    def get_custom_prompts(self, server_name: str) -> Tuple[Dict[str, Any], ...]:
+        """
+        Return the custom prompts selected by a virtual server, from the PromptManager.
+        Results are cached until invalidate_custom_prompts(); treat them as read-only.
+        """
+        return self._custom_prompts(server_name)
+
+    def _load_custom_prompts(self, server_name: str) -> Tuple[Dict[str, Any], ...]:
+        """Resolve a virtual server's selected_prompts into prompt configs, skipping missing ones."""
+        if self.prompt_manager is None:
+            return ()
+        server = self.get_virtual_server(server_name)
+        if server is None:
+            return ()
+        
+        prompts = []
+        for prompt_id in server.selected_prompts:
+            prompt = self.prompt_manager.get_prompt(prompt_id)
+            if prompt:
+                prompts.append({
+                    'name': prompt.id,
+                    'description': prompt.description,
+                    'arguments': [
+                        {
+                            'name': var_name,
+                            'description': f"Input for the '{var_name}' variable in the prompt.",
+                            'required': True
+                        }
+                        for var_name in prompt.input_variables
+                    ],
+                    'content': prompt.prompt_template
+                })
+        return tuple(prompts)
+
+    def get_custom_prompt(self, server_name: str, prompt_name: str) -> Optional[Dict[str, Any]]:
+        """Return a virtual server's custom prompt by name, or None."""
+        return next((p for p in self.get_custom_prompts(server_name) if p.get('name') == prompt_name), None)
+
     def get_prompt_content(self, server_name: str, prompt_name: str, arguments: dict, discoverer: IServerDiscoverer):
         """Get the actual prompt content from registry entry tool configs or custom prompts."""
         try:
@@ -333,15 +590,13 @@ class VirtualServerManager:
                     return self._process_custom_prompt(custom_prompt, arguments)
                 
                 # Then look through selected tools to find source registry entries
-                registry_entries = discoverer.discover()
-                for tool_config in target_server.selected_tools:
-                    source_server_name = tool_config.get('server_name')
-                    if source_server_name:
-                        source_entry = next((entry for entry in registry_entries if entry.name == source_server_name), None)
-                        if source_entry:
-                            prompt_content = self._search_prompt_in_server(source_entry, prompt_name, arguments)
-                            if prompt_content:
-                                return prompt_content
+                entries_by_name = self._entries_by_name(discoverer)
+                for source_server_name in self._source_server_names(target_server):
+                    source_entry = entries_by_name.get(source_server_name)
+                    if source_entry:
+                        prompt_content = self._search_prompt_in_server(source_entry, prompt_name, arguments)
+                        if prompt_content:
+                            return prompt_content
             elif isinstance(target_server, ServerInfo):
                 # Registry entry - search directly
                 return self._search_prompt_in_server(target_server, prompt_name, arguments)
@@ -356,17 +611,17 @@ class VirtualServerManager:
         try:
             content = custom_prompt.get('content', '')
             
-            # Simple template processing - replace {{arg_name}} with argument values
-            processed_content = content
-            for arg_name, arg_value in arguments.items():
-                processed_content = processed_content.replace(f'{{{{{arg_name}}}}}', str(arg_value))
+            # Missing arguments fall back to their declared (non-empty) defaults
+            values = {
+                arg_config['name']: arg_config['default']
+                for arg_config in custom_prompt.get('arguments', [])
+                if arg_config.get('name') and arg_config.get('default', '')
+            }
+            values.update(arguments)
             
-            # Set default values for missing arguments
-            for arg_config in custom_prompt.get('arguments', []):
-                arg_name = arg_config.get('name')
-                default_value = arg_config.get('default', '')
-                if arg_name and arg_name not in arguments and default_value:
-                    processed_content = processed_content.replace(f'{{{{{arg_name}}}}}', str(default_value))
+            # Simple template processing - replace {{arg_name}} with argument values in one pass
+            processed_content = _DOUBLE_BRACE_RE.sub(
+                lambda m: str(values[m.group(1)]) if m.group(1) in values else m.group(0), content)
             
             return {
                 'description': custom_prompt.get('description', ''),
@@ -382,36 +637,22 @@ class VirtualServerManager:
     def _search_prompt_in_server(self, server: ServerInfo, prompt_name: str, arguments: dict):
         """Search for a prompt in a specific server's tool configs."""
         try:
-            server_dir = self.workspace_root / server.path
-            tools_dir = server_dir / "tools"
-            
-            if not tools_dir.exists():
+            prompt_config = self._prompt_index_for_server(server).get(prompt_name)
+            if prompt_config is None:
                 return None
             
-            # Search through tool configs for the prompt
-            for tool_dir in tools_dir.iterdir():
-                if tool_dir.is_dir():
-                    config_path = tool_dir / "config.yaml"
-                    if config_path.exists():
-                        with open(config_path, 'r') as f:
-                            tool_config = yaml.safe_load(f)
-                        
-                        for prompt_config in tool_config.get('prompts', []):
-                            if prompt_config['name'] == prompt_name:
-                                # Process the template with arguments
-                                template = prompt_config.get('template', '')
-                                
-                                # Simple template processing - replace {arg_name} with argument values
-                                processed_template = template
-                                for arg_name, arg_value in arguments.items():
-                                    processed_template = processed_template.replace(f'{{{arg_name}}}', str(arg_value))
-                                
-                                return {
-                                    'description': prompt_config.get('description', ''),
-                                    'content': processed_template
-                                }
+            # Process the template with arguments
+            template = prompt_config.get('template', '')
             
-            return None
+            # Simple template processing - replace {arg_name} with argument values in one pass
+            processed_template = _SINGLE_BRACE_RE.sub(
+                lambda m: str(arguments[m.group(1)]) if m.group(1) in arguments else m.group(0),
+                template)
+            
+            return {
+                'description': prompt_config.get('description', ''),
+                'content': processed_template
+            }
         except Exception as e:
             logger.error(f"Error searching prompt in server {server.name}: {e}")
             return None 
\ No newline at end of file
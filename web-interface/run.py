@@ -1,6 +1,9 @@
+import logging
 import os
 from app import create_app
 
+logging.basicConfig(level=logging.INFO)
+
 # Get the configuration name from the environment or use development as default
 config_name = os.getenv('FLASK_CONFIG', 'development')
 
@@ -145,19 +145,22 @@ class StorageBackend(ABC):
         """Migrate data from another backend. Returns True on success."""
         pass
     
+    @abstractmethod
+    def ping(self) -> bool:
+        """Cheap reachability check (e.g. SELECT 1, or a directory stat). Returns True if usable."""
+        pass
+    
     # Utility Methods
     def health_check(self) -> Dict[str, Any]:
         """Check the health of the storage backend."""
         try:
-            # Basic connectivity test
-            servers = self.get_servers()
-            virtual_servers = self.get_virtual_servers()
+            # Constant-cost probe; use counts() for the full inventory
+            if not self.ping():
+                raise StorageError("storage backend is not reachable")
             
             return {
                 "status": "healthy",
                 "backend_type": self.config.backend_type,
-                "servers_count": len(servers),
-                "virtual_servers_count": len(virtual_servers),
                 "last_check": "now"
             }
         except Exception as e:
@@ -167,6 +170,20 @@ class StorageBackend(ABC):
                 "error": str(e),
                 "last_check": "now"
             }
+    
+    def counts(self) -> Dict[str, Any]:
+        """Count stored servers and virtual servers. Loads everything, so keep it off liveness probes."""
+        try:
+            return {
+                "backend_type": self.config.backend_type,
+                "servers_count": len(self.get_servers()),
+                "virtual_servers_count": len(self.get_virtual_servers())
+            }
+        except Exception as e:
+            return {
+                "backend_type": self.config.backend_type,
+                "error": str(e)
+            }
 
 
 class StorageError(Exception):